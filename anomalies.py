@@ -0,0 +1,189 @@
+# anomalies.py
+# Проверка каждого показания при сохранении: пороги по типу устройства и кофейне
+# плюс скользящая норма устройства (EWMA + z-score). Выход за пределы — сразу алерт менеджерам
+
+import asyncio
+import html
+import logging
+import math
+import os
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable
+
+from aiogram import Bot
+
+# Допустимые температуры по типу устройства (min, max); None — без границы
+TEMP_LIMITS = {
+    "fridge": (float(os.getenv("FRIDGE_MIN_TEMP", "2")), float(os.getenv("FRIDGE_MAX_TEMP", "6"))),
+    "freezer": (None, float(os.getenv("FREEZER_MAX_TEMP", "-18"))),
+}
+
+# Скользящая норма: вес нового показания, порог z-score и минимальное отклонение в градусах
+ANOMALY_EWMA_ALPHA = float(os.getenv("ANOMALY_EWMA_ALPHA", "0.1"))
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "4"))
+ANOMALY_MIN_DELTA = float(os.getenv("ANOMALY_MIN_DELTA", "2"))
+ANOMALY_MIN_SAMPLES = int(os.getenv("ANOMALY_MIN_SAMPLES", "10"))
+# За сколько дней истории прогревается норма при старте
+ANOMALY_WARMUP_DAYS = int(os.getenv("ANOMALY_WARMUP_DAYS", "30"))
+# Общий чат менеджеров — для кофеен без своего чата
+ALERT_CHAT_ID = int(os.getenv("ALERT_CHAT_ID", "0")) or None
+
+DEVICE_NAMES_RU = {"fridge": "Холодильник", "freezer": "Морозилка"}
+
+
+@dataclass
+class Baseline:
+    mean: float
+    var: float = 0.0
+    count: int = 1
+
+    # Экспоненциально взвешенные среднее и дисперсия: O(1) на показание
+    def update(self, temp: float, alpha: float):
+        diff = temp - self.mean
+        incr = alpha * diff
+        self.mean += incr
+        self.var = (1 - alpha) * (self.var + diff * incr)
+        self.count += 1
+
+
+@dataclass(frozen=True)
+class Anomaly:
+    shop: str
+    device_type: str
+    device_number: int
+    temp: float
+    reason: str  # limit / baseline
+    low: float | None = None
+    high: float | None = None
+    mean: float | None = None
+    std: float | None = None
+    barista: str | None = None
+
+    def describe(self) -> str:
+        device = f"{DEVICE_NAMES_RU.get(self.device_type, self.device_type)} {self.device_number}"
+        line = f"{device}: <b>{self.temp:+g} °C</b>"
+        if self.reason == "limit":
+            low = "…" if self.low is None else f"{self.low:g}"
+            high = "…" if self.high is None else f"{self.high:g}"
+            return f"{line} — вне нормы ({low} … {high})"
+        return f"{line} — резкое отклонение от обычных {self.mean:.1f} ± {self.std:.1f}"
+
+
+class AnomalyDetector:
+    def __init__(self, default_limits: dict[str, tuple[float | None, float | None]] = TEMP_LIMITS):
+        self.default_limits = default_limits
+        # Пороги конкретных кофеен: (кофейня, тип) → (min, max)
+        self.shop_limits: dict[tuple[str, str], tuple[float | None, float | None]] = {}
+        self.baselines: dict[tuple[str, str, int], Baseline] = {}
+        # Чаты менеджеров по кофейням
+        self.alert_chats: dict[str, list[int]] = {}
+        self.alert_handler: Callable[[list[Anomaly]], Awaitable[None]] | None = None
+        self.tasks: set[asyncio.Task] = set()
+
+    def limits(self, shop: str, device_type: str) -> tuple[float | None, float | None]:
+        limits = self.shop_limits.get((shop, device_type))
+        if limits is None:
+            limits = self.default_limits.get(device_type, (None, None))
+        return limits
+
+    def is_out_of_range(self, shop: str, device_type: str, temp: float) -> bool:
+        low, high = self.limits(shop, device_type)
+        return (low is not None and temp < low) or (high is not None and temp > high)
+
+    def configure(self, shop_limits: Iterable[tuple], alert_chats: Iterable[tuple[str, int]]):
+        self.shop_limits = {(shop, device_type): (low, high) for shop, device_type, low, high in shop_limits}
+        chats: dict[str, list[int]] = {}
+        for shop, chat_id in alert_chats:
+            chats.setdefault(shop, []).append(chat_id)
+        self.alert_chats = chats
+
+    # Прогрев нормы историческими показаниями (в хронологическом порядке).
+    # Как и в check(), показания вне порогов норму не сдвигают; возвращаем, сколько учтено
+    def warm(self, readings: Iterable[tuple[str, str, int, float]]) -> int:
+        count = 0
+        for shop, device_type, device_number, temp in readings:
+            if self.is_out_of_range(shop, device_type, temp):
+                continue
+            self._observe((shop, device_type, device_number), temp)
+            count += 1
+        return count
+
+    def _observe(self, key: tuple[str, str, int], temp: float):
+        baseline = self.baselines.get(key)
+        if baseline is None:
+            self.baselines[key] = Baseline(mean=temp)
+        else:
+            baseline.update(temp, ANOMALY_EWMA_ALPHA)
+
+    # Проверка одного показания: сначала пороги, затем отклонение от нормы устройства
+    def check(self, shop: str, device_type: str, device_number: int, temp: float, barista: str | None = None) -> Anomaly | None:
+        low, high = self.limits(shop, device_type)
+        if (low is not None and temp < low) or (high is not None and temp > high):
+            # Показание вне порогов норму не сдвигает: поломка не должна стать «обычной»
+            return Anomaly(shop, device_type, device_number, temp, "limit", low=low, high=high, barista=barista)
+
+        key = (shop, device_type, device_number)
+        baseline = self.baselines.get(key)
+        anomaly = None
+        if baseline is not None and baseline.count >= ANOMALY_MIN_SAMPLES:
+            std = math.sqrt(baseline.var)
+            delta = abs(temp - baseline.mean)
+            if delta >= ANOMALY_MIN_DELTA and delta > ANOMALY_Z_THRESHOLD * std:
+                anomaly = Anomaly(
+                    shop, device_type, device_number, temp, "baseline",
+                    mean=baseline.mean, std=std, barista=barista,
+                )
+        self._observe(key, temp)
+        return anomaly
+
+    def evaluate(self, shop: str, entries: list[dict], barista: str | None = None) -> list[Anomaly]:
+        found = []
+        for entry in entries:
+            anomaly = self.check(shop, entry["type"], entry["number"], entry["temp"], barista)
+            if anomaly is not None:
+                found.append(anomaly)
+        return found
+
+    def chats_for(self, shop: str) -> list[int]:
+        chats = self.alert_chats.get(shop)
+        if chats:
+            return chats
+        return [ALERT_CHAT_ID] if ALERT_CHAT_ID else []
+
+    # Алерт уходит фоновой задачей — сохранение журнала его не ждёт
+    def notify(self, found: list[Anomaly]):
+        if not found or self.alert_handler is None:
+            return
+        task = asyncio.create_task(self.alert_handler(found))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+
+def format_alert(found: list[Anomaly]) -> str:
+    first = found[0]
+    lines = [f"🚨 <b>{html.escape(first.shop)}</b>"]
+    lines += [anomaly.describe() for anomaly in found]
+    if first.barista:
+        lines.append(f"Бариста: {html.escape(first.barista)}")
+    return "\n".join(lines)
+
+
+async def send_alerts(bot: Bot, found: list[Anomaly]):
+    chats = anomaly_detector.chats_for(found[0].shop)
+    if not chats:
+        logging.warning(f"[ALERT] Нет чата менеджеров для {found[0].shop}: {len(found)} отклонений")
+        return
+    text = format_alert(found)
+    for chat_id in chats:
+        try:
+            await bot.send_message(chat_id, text)
+        except Exception as e:
+            logging.error(f"[ALERT] Не удалось отправить алерт в чат {chat_id}: {e}")
+    logging.info(f"[ALERT] {found[0].shop}: {len(found)} отклонений, чатов: {len(chats)}")
+
+
+def register_alert_handler(bot: Bot):
+    anomaly_detector.alert_handler = lambda found: send_alerts(bot, found)
+
+
+anomaly_detector = AnomalyDetector()
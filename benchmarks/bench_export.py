@@ -0,0 +1,81 @@
+# benchmarks/bench_export.py
+# Выгрузка журнала из миллиона строк: пиковая память (RSS) и скорость
+#
+# Запуск: DATABASE_URL=postgresql://... python -m benchmarks.bench_export [--rows 1000000] [--xlsx]
+# Данные генерируются во временную таблицу temp_journal этого соединения.
+
+import argparse
+import asyncio
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import date, time as dtime, timedelta
+
+import asyncpg
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DB_URL  # noqa: E402
+from export import write_journal_csv, write_journal_xlsx  # noqa: E402
+from catalogue import COFFEE_LIST  # noqa: E402
+
+START_DATE = date(2024, 1, 1)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss: килобайты в Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def synthetic_rows(count: int):
+    shops = [name.replace("Москва ", "") for name in COFFEE_LIST]
+    for i in range(count):
+        is_fridge = i % 3 != 0
+        yield (
+            1000 + i % 200,
+            "Бариста Тестовый",
+            shops[i % len(shops)],
+            START_DATE + timedelta(days=(i // 2000) % 365),
+            dtime(9 + i % 12, i % 60),
+            "Холодильник" if is_fridge else "Морозилка",
+            1 + i % 4,
+            round(random.uniform(1, 7) if is_fridge else random.uniform(-22, -16), 1),
+        )
+
+
+async def main(rows: int, xlsx: bool):
+    conn = await asyncpg.connect(DB_URL)
+    try:
+        await conn.execute("""
+            CREATE TEMP TABLE temp_journal (
+                user_id BIGINT, barista TEXT, coffeeshop_id TEXT,
+                date DATE, time TIME, device_type TEXT,
+                device_number INT, temperature REAL
+            )
+        """)
+        await conn.copy_records_to_table("temp_journal", records=synthetic_rows(rows))
+        print(f"сгенерировано строк: {rows}, RSS до выгрузки: {peak_rss_mb():.1f} MB")
+
+        writer = write_journal_xlsx if xlsx else write_journal_csv
+        path = os.path.join(tempfile.gettempdir(), f"bench_journal.{'xlsx' if xlsx else 'csv'}")
+        started = time.perf_counter()
+        count = await writer(conn, path, START_DATE, START_DATE + timedelta(days=365))
+        elapsed = time.perf_counter() - started
+
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        os.remove(path)
+        print(f"выгружено строк: {count} ({size_mb:.1f} MB) за {elapsed:.1f} с, "
+              f"{count / elapsed:.0f} строк/с, пиковый RSS: {peak_rss_mb():.1f} MB")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--xlsx", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.xlsx))
@@ -0,0 +1,146 @@
+# benchmarks/bench_fsm_ops.py
+# Сколько запросов к FSM-хранилищу делает один апдейт: прямые вызовы FSMContext
+# (как было в обработчиках) против BaristaSession (одно чтение, одна запись)
+#
+# Запуск: python -m benchmarks.bench_fsm_ops
+# Для удалённого хранилища каждое обращение — отдельный запрос к серверу.
+
+import asyncio
+import os
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram.fsm.context import FSMContext  # noqa: E402
+from aiogram.fsm.storage.base import StorageKey  # noqa: E402
+from aiogram.fsm.storage.memory import MemoryStorage  # noqa: E402
+
+from fsm_session import BaristaSession  # noqa: E402
+from session_states import SessionState  # noqa: E402
+
+
+# Хранилище, которое считает запросы так, как их делает PostgresStorage:
+# update_data и set_state_and_data — один запрос, get_data сразу после get_state — ноль
+class CountingStorage(MemoryStorage):
+    def __init__(self):
+        super().__init__()
+        self.ops = Counter()
+        self.prefetched = False
+
+    async def get_state(self, key):
+        self.ops["get_state"] += 1
+        self.prefetched = True
+        return await super().get_state(key)
+
+    async def set_state(self, key, state=None):
+        self.ops["set_state"] += 1
+        self.prefetched = False
+        await super().set_state(key, state)
+
+    async def get_data(self, key):
+        if not self.prefetched:
+            self.ops["get_data"] += 1
+        self.prefetched = False
+        return await super().get_data(key)
+
+    async def set_data(self, key, data):
+        self.ops["set_data"] += 1
+        self.prefetched = False
+        await super().set_data(key, data)
+
+    async def update_data(self, key, data):
+        self.ops["update_data"] += 1
+        self.prefetched = False
+        current = await MemoryStorage.get_data(self, key)
+        current.update(data)
+        await MemoryStorage.set_data(self, key, current)
+        return current.copy()
+
+    async def set_state_and_data(self, key, state, data):
+        self.ops["set_state_and_data"] += 1
+        self.prefetched = False
+        await MemoryStorage.set_state(self, key, state)
+        await MemoryStorage.set_data(self, key, data)
+
+
+KEY = StorageKey(bot_id=0, chat_id=1, user_id=1)
+
+
+# --- Было: так обработчики работали с FSMContext напрямую ---
+
+async def old_choose_type(state: FSMContext):
+    await state.update_data(current_type="fridge")
+    await state.set_state(SessionState.entering_temperature)
+
+
+async def old_temperature(state: FSMContext):
+    data = await state.get_data()
+    entries = data.get("entries", [])
+    fridge_count = data.get("fridge_count", 0) + 1
+    entries.append({"type": data.get("current_type"), "number": fridge_count, "temp": 4.0})
+    await state.update_data(entries=entries, fridge_count=fridge_count, current_type=None)
+    await state.set_state(SessionState.choosing_device_type)
+
+
+async def old_name(state: FSMContext):
+    await state.update_data(barista_name="Иван Петров")
+    data = await state.get_data()
+    _ = data.get("coffee_code"), data.get("entries"), data.get("barista_name")
+    await state.clear()
+
+
+# --- Стало: middleware грузит сессию один раз и сохраняет один раз ---
+
+async def with_session(storage, handler):
+    session = await BaristaSession.load(storage, KEY, await storage.get_state(KEY))
+    handler(session)
+    await session.flush(storage, KEY)
+
+
+def new_choose_type(session: BaristaSession):
+    session.current_type = "fridge"
+    session.set_state(SessionState.entering_temperature)
+
+
+def new_temperature(session: BaristaSession):
+    session.add_entry(session.current_type, 4.0)
+    session.current_type = None
+    session.set_state(SessionState.choosing_device_type)
+
+
+def new_name(session: BaristaSession):
+    session.barista_name = "Иван Петров"
+    session.clear()
+
+
+async def main():
+    rows = []
+    steps = [
+        ("type:", old_choose_type, new_choose_type),
+        ("температура", old_temperature, new_temperature),
+        ("имя", old_name, new_name),
+    ]
+    for name, old, new in steps:
+        storage = CountingStorage()
+        await storage.set_data(KEY, {"coffee_code": "Москва 0-1 (Омега Плаза)", "current_type": "fridge"})
+        storage.ops.clear()
+        # raw_state aiogram читает сам в FSMContextMiddleware — учитываем и его
+        state = FSMContext(storage=storage, key=KEY)
+        await state.get_state()
+        await old(state)
+        before = sum(storage.ops.values())
+
+        storage.ops.clear()
+        await with_session(storage, new)
+        after = sum(storage.ops.values())
+        rows.append((name, before, after))
+
+    print("Запросов к хранилищу на апдейт (с учётом get_state из FSMContextMiddleware):")
+    print(f"{'апдейт':>12} | {'было':>5} | {'стало':>6}")
+    for name, before, after in rows:
+        print(f"{name:>12} | {before:>5} | {after:>6}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+# benchmarks/bench_fsm_storage.py
+# Задержка FSM-операций одного апдейта: MemoryStorage против PostgresStorage
+#
+# Запуск: DATABASE_URL=postgresql://... python -m benchmarks.bench_fsm_storage
+# Нужна таблица fsm_storage (migrations/002_fsm_storage.sql).
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram.fsm.context import FSMContext  # noqa: E402
+from aiogram.fsm.storage.base import StorageKey  # noqa: E402
+from aiogram.fsm.storage.memory import MemoryStorage  # noqa: E402
+
+from database import close_pool, init_pool  # noqa: E402
+from fsm_storage import PostgresStorage  # noqa: E402
+from session_states import SessionState  # noqa: E402
+
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "200"))
+
+
+# То же, что делает get_temperature: прочитать данные, дописать запись, сменить состояние
+async def temperature_update(state: FSMContext, i: int):
+    data = await state.get_data()
+    entries = data.get("entries", [])
+    entries.append({"type": "fridge", "number": i, "temp": 3.5})
+    await state.update_data(entries=entries, fridge_count=i, current_type=None)
+    await state.set_state(SessionState.choosing_device_type)
+
+
+async def measure(storage, name: str):
+    state = FSMContext(storage=storage, key=StorageKey(bot_id=0, chat_id=-1, user_id=-1))
+    await state.clear()
+    samples = []
+    for i in range(ROUNDS):
+        if i % 10 == 0:
+            await state.clear()
+        started = time.perf_counter()
+        await temperature_update(state, i)
+        samples.append((time.perf_counter() - started) * 1000)
+    await state.clear()
+    samples.sort()
+    print(f"{name:>10}: p50={statistics.median(samples):.3f} ms, "
+          f"p95={samples[int(len(samples) * 0.95)]:.3f} ms")
+
+
+async def main():
+    await measure(MemoryStorage(), "memory")
+    await init_pool()
+    try:
+        await measure(PostgresStorage(), "postgres")
+    finally:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+# benchmarks/bench_keyboards.py
+# Сколько памяти и времени уходит на клавиатуру в одном апдейте: сборка + сериализация
+# на каждый запрос (как раньше) против готовых клавиатур из utils/keyboards.py
+#
+# Запуск: python -m benchmarks.bench_keyboards
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram import Bot  # noqa: E402
+from aiogram.client.session.aiohttp import AiohttpSession  # noqa: E402
+from aiogram.methods import SendMessage  # noqa: E402
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup  # noqa: E402
+
+from catalogue import COFFEE_LIST  # noqa: E402
+from utils.keyboards import PER_PAGE, KeyboardAwareSession, coffee_keyboard, device_type_kb  # noqa: E402
+
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "5000"))
+BOT = Bot("1:fake")
+
+
+# Старый вариант: клавиатуры собираются заново на каждое сообщение
+def build_device_type_kb():
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="🧊 Холодильник", callback_data="type:fridge")],
+        [InlineKeyboardButton(text="❄️ Морозилка", callback_data="type:freezer")]
+    ])
+
+
+def build_coffee_keyboard(page: int):
+    start = page * PER_PAGE
+    end = start + PER_PAGE
+    buttons = [
+        [InlineKeyboardButton(text=name, callback_data=f"select_index:{i}")]
+        for i, name in enumerate(COFFEE_LIST[start:end], start=start)
+    ]
+    nav_buttons = []
+    if page > 0:
+        nav_buttons.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"page:{page - 1}"))
+    if end < len(COFFEE_LIST):
+        nav_buttons.append(InlineKeyboardButton(text="➡️ Далее", callback_data=f"page:{page + 1}"))
+    if nav_buttons:
+        buttons.append(nav_buttons)
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def run(session, device_kb, page_kb) -> tuple[float, float]:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    allocated = 0
+    started = time.perf_counter()
+    for i in range(ROUNDS):
+        markup = device_kb() if i % 2 else page_kb(i % 4)
+        session.build_form_data(BOT, SendMessage(chat_id=1, text="Выбери тип устройства:", reply_markup=markup))
+        if i % 100 == 0:
+            allocated = max(allocated, tracemalloc.get_traced_memory()[1] - before)
+    elapsed = time.perf_counter() - started
+    tracemalloc.stop()
+    return elapsed / ROUNDS * 1e6, allocated / 1024
+
+
+def main():
+    # Прогреваем кэш страниц, как при старте бота
+    for page in range(4):
+        coffee_keyboard(page)
+
+    old_us, old_kb = run(AiohttpSession(), build_device_type_kb, build_coffee_keyboard)
+    new_us, new_kb = run(KeyboardAwareSession(), device_type_kb, coffee_keyboard)
+    print(f"{'':>10} | {'мкс на апдейт':>14} | {'пик аллокаций, KB':>18}")
+    print(f"{'сборка':>10} | {old_us:>14.1f} | {old_kb:>18.1f}")
+    print(f"{'реестр':>10} | {new_us:>14.1f} | {new_kb:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
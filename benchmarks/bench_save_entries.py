@@ -0,0 +1,74 @@
+# benchmarks/bench_save_entries.py
+# Сравнение записи сессии построчно и одной пачкой (executemany в транзакции)
+#
+# Запуск: DATABASE_URL=postgresql://... python -m benchmarks.bench_save_entries
+# Пишет во временную таблицу temp_journal (видна только этому соединению),
+# настоящий журнал не трогается.
+
+import asyncio
+import os
+import statistics
+import sys
+import time as timer
+from datetime import datetime
+
+import asyncpg
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DB_URL, INSERT_TEMP_ENTRY_SQL, build_temperature_rows  # noqa: E402
+
+SESSION_SIZES = (3, 10, 50)
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "50"))
+
+
+def make_entries(count: int) -> list[dict]:
+    return [
+        {"type": "fridge" if i % 2 == 0 else "freezer", "number": i + 1, "temp": 3.5 if i % 2 == 0 else -18.0}
+        for i in range(count)
+    ]
+
+
+async def per_row(conn: asyncpg.Connection, rows: list[tuple]):
+    for row in rows:
+        await conn.execute(INSERT_TEMP_ENTRY_SQL, *row)
+
+
+async def batched(conn: asyncpg.Connection, rows: list[tuple]):
+    async with conn.transaction():
+        await conn.executemany(INSERT_TEMP_ENTRY_SQL, rows)
+
+
+async def measure(conn: asyncpg.Connection, func, rows: list[tuple]) -> list[float]:
+    samples = []
+    for _ in range(ROUNDS):
+        started = timer.perf_counter()
+        await func(conn, rows)
+        samples.append((timer.perf_counter() - started) * 1000)
+    return samples
+
+
+async def main():
+    conn = await asyncpg.connect(DB_URL)
+    try:
+        await conn.execute("""
+            CREATE TEMP TABLE temp_journal (
+                user_id BIGINT, barista TEXT, coffeeshop_id TEXT,
+                date DATE, time TIME, device_type TEXT,
+                device_number INT, temperature REAL
+            )
+        """)
+        now = datetime.now()
+        print(f"{'devices':>8} | {'per-row p50, ms':>16} | {'batched p50, ms':>16} | {'speedup':>8}")
+        for size in SESSION_SIZES:
+            rows = build_temperature_rows(1, "Бенч Бенчев", "Москва 0-1 (Омега Плаза)",
+                                          make_entries(size), now.date(), now.time())
+            slow = statistics.median(await measure(conn, per_row, rows))
+            fast = statistics.median(await measure(conn, batched, rows))
+            print(f"{size:>8} | {slow:>16.2f} | {fast:>16.2f} | {slow / fast:>7.1f}x")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
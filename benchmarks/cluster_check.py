@@ -0,0 +1,104 @@
+# benchmarks/cluster_check.py
+# Локальная проверка нескольких реплик на одной БД: ровно один лидер,
+# каждый пользователь принадлежит ровно одной реплике, после остановки лидера его место занимает другая
+#
+# Запуск: DATABASE_URL=postgresql://... python -m benchmarks.cluster_check
+# Нужна таблица bot_replicas (migrations/008_bot_replicas.sql).
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REPLICAS = int(os.getenv("CLUSTER_CHECK_REPLICAS", "3"))
+USERS = int(os.getenv("CLUSTER_CHECK_USERS", "10000"))
+HEARTBEAT = "1"
+
+
+# Одна реплика: печатает своё состояние в stdout каждую секунду
+async def replica():
+    from cluster import cluster
+    from database import close_pool, init_pool
+
+    await init_pool()
+    await cluster.start()
+    try:
+        while True:
+            owned = [user_id for user_id in range(USERS) if cluster.owns(user_id)]
+            print(json.dumps({
+                "replica": cluster.replica_id,
+                "leader": cluster.is_leader,
+                "replicas": len(cluster.ring.replicas),
+                "owned": len(owned),
+                "checksum": sum(owned),
+            }), flush=True)
+            await asyncio.sleep(1)
+    finally:
+        await cluster.stop()
+        await close_pool()
+
+
+def spawn(index: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "CLUSTER_ENABLED": "1",
+        "REPLICA_ID": f"check-{index}",
+        "CLUSTER_HEARTBEAT": HEARTBEAT,
+        "CLUSTER_REPLICA_TTL": "3",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.cluster_check", "--replica"],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True,
+    )
+
+
+def snapshot(processes: dict[int, subprocess.Popen]) -> dict[int, dict]:
+    return {index: json.loads(process.stdout.readline()) for index, process in processes.items()}
+
+
+def report(title: str, states: dict[int, dict]) -> bool:
+    leaders = [state["replica"] for state in states.values() if state["leader"]]
+    owned = sum(state["owned"] for state in states.values())
+    checksum = sum(state["checksum"] for state in states.values())
+    ok = len(leaders) == 1 and owned == USERS and checksum == USERS * (USERS - 1) // 2
+    print(f"{title}: лидер {leaders}, пользователей {owned}/{USERS}, "
+          f"по репликам {[state['owned'] for state in states.values()]} — {'OK' if ok else 'FAIL'}")
+    return ok
+
+
+def main():
+    processes = {index: spawn(index) for index in range(REPLICAS)}
+    try:
+        # Ждём, пока все реплики увидят друг друга
+        deadline = time.time() + 15
+        while True:
+            states = snapshot(processes)
+            if all(state["replicas"] == REPLICAS for state in states.values()) or time.time() > deadline:
+                break
+        ok = report(f"{REPLICAS} реплики", states)
+
+        leader = next(index for index, state in states.items() if state["leader"])
+        processes.pop(leader).terminate()
+        deadline = time.time() + 15
+        while True:
+            states = snapshot(processes)
+            settled = all(state["replicas"] == REPLICAS - 1 for state in states.values())
+            if (settled and any(state["leader"] for state in states.values())) or time.time() > deadline:
+                break
+        ok = report(f"без check-{leader}", states) and ok
+    finally:
+        for process in processes.values():
+            process.terminate()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    if "--replica" in sys.argv:
+        asyncio.run(replica())
+    else:
+        main()
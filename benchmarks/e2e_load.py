@@ -0,0 +1,214 @@
+# benchmarks/e2e_load.py
+# Сквозной нагрузочный тест: настоящий Dispatcher из bot_barista.create_dispatcher,
+# фейковый Telegram Bot API (benchmarks/fake_telegram.py) и in-memory БД или локальный Postgres.
+# Каждый «бариста» проходит сценарий сессии целиком:
+# /start → start_session → select_index → type → температура ×3 → finish_devices → имя
+#
+# Запуск:
+#   python -m benchmarks.e2e_load --sessions 500 --concurrency 50
+#   python -m benchmarks.e2e_load --db-latency-ms 1          # имитация сетевой задержки до БД
+#   DATABASE_URL=postgresql://... python -m benchmarks.e2e_load --postgres [--fsm postgres]
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import asyncpg  # noqa: E402
+from aiogram import Bot  # noqa: E402
+from aiogram.client.telegram import TelegramAPIServer  # noqa: E402
+from aiogram.fsm.storage.memory import MemoryStorage  # noqa: E402
+from aiogram.types import Update  # noqa: E402
+from aiohttp import web  # noqa: E402
+
+import database  # noqa: E402
+from benchmarks import fake_database  # noqa: E402
+from benchmarks.fake_telegram import FakeTelegram  # noqa: E402
+from bot_barista import create_dispatcher  # noqa: E402
+from catalogue import catalogue  # noqa: E402
+from fsm_storage import PostgresStorage  # noqa: E402
+from journal_queue import journal_queue  # noqa: E402
+from utils.keyboards import KeyboardAwareSession  # noqa: E402
+
+FAKE_TELEGRAM_PORT = int(os.getenv("FAKE_TELEGRAM_PORT", "8081"))
+FIRST_USER_ID = 100_000
+
+# (шаг, тип апдейта, данные) — одна сессия бариста
+SESSION_SCRIPT = [
+    ("start", "message", "/start"),
+    ("start_session", "callback", "start_session"),
+    ("select_index", "callback", "select_index:{shop}"),
+    ("type", "callback", "type:fridge"),
+    ("temperature", "message", "3.5"),
+    ("type", "callback", "type:fridge"),
+    ("temperature", "message", "4.1"),
+    ("type", "callback", "type:freezer"),
+    ("temperature", "message", "-18.5"),
+    ("finish_devices", "callback", "finish_devices"),
+    ("name", "message", "Иван Петров"),
+]
+
+
+def percentile(samples: list[float], q: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+class Harness:
+    def __init__(self, dp, bot: Bot):
+        self.dp = dp
+        self.bot = bot
+        self.update_ids = itertools.count(1)
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors = 0
+
+    def make_update(self, user_id: int, kind: str, payload: str) -> Update:
+        update_id = next(self.update_ids)
+        user = {"id": user_id, "is_bot": False, "first_name": "Бариста"}
+        chat = {"id": user_id, "type": "private"}
+        if kind == "message":
+            return Update.model_validate({
+                "update_id": update_id,
+                "message": {"message_id": update_id, "date": int(time.time()), "chat": chat, "from": user, "text": payload},
+            })
+        return Update.model_validate({
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "chat_instance": str(user_id),
+                "from": user,
+                "data": payload,
+                "message": {"message_id": update_id, "date": int(time.time()), "chat": chat, "from": user, "text": "…"},
+            },
+        })
+
+    async def run_session(self, user_id: int):
+        shop = user_id % len(catalogue.shops)
+        for step, kind, payload in SESSION_SCRIPT:
+            update = self.make_update(user_id, kind, payload.format(shop=shop))
+            started = time.perf_counter()
+            try:
+                await self.dp.feed_update(self.bot, update)
+            except Exception:
+                self.errors += 1
+                logging.exception(f"[E2E] Ошибка на шаге {step}")
+            self.latencies[step].append((time.perf_counter() - started) * 1000)
+
+    async def run(self, sessions: int, concurrency: int, users: int):
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for i in range(sessions):
+            queue.put_nowait(FIRST_USER_ID + i % users)
+        # Один пользователь не ведёт две сессии одновременно
+        busy: set[int] = set()
+
+        async def worker():
+            while not queue.empty():
+                user_id = queue.get_nowait()
+                while user_id in busy:
+                    await asyncio.sleep(0.001)
+                busy.add(user_id)
+                try:
+                    await self.run_session(user_id)
+                finally:
+                    busy.discard(user_id)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+def counting_pool_init(counter: dict):
+    def on_query(record):
+        counter["round_trips"] += 1
+
+    async def init(conn: asyncpg.Connection):
+        conn.add_query_logger(on_query)
+    return init
+
+
+async def main(args):
+    logging.basicConfig(level=logging.WARNING)
+
+    # Фейковый Bot API в том же процессе
+    fake = FakeTelegram()
+    runner = web.AppRunner(fake.app())
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", args.telegram_port).start()
+
+    counter = {"round_trips": 0}
+    fake_pool = None
+    if args.postgres:
+        database._pool = await asyncpg.create_pool(
+            database.DB_URL,
+            min_size=database.DB_POOL_MIN_SIZE,
+            max_size=database.DB_POOL_MAX_SIZE,
+            statement_cache_size=database.DB_STATEMENT_CACHE_SIZE,
+            init=counting_pool_init(counter),
+        )
+    else:
+        fake_pool = fake_database.install(args.db_latency_ms)
+    await catalogue.load()
+
+    queue_dir = tempfile.TemporaryDirectory()
+    journal_queue.path = os.path.join(queue_dir.name, "journal_queue.sqlite3")
+    await journal_queue.start()
+
+    bot = Bot(
+        "123456:fake-token",
+        session=KeyboardAwareSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{args.telegram_port}")),
+    )
+    storage = PostgresStorage() if args.fsm == "postgres" else MemoryStorage()
+    dp = create_dispatcher(bot, storage=storage)
+    harness = Harness(dp, bot)
+
+    started = time.perf_counter()
+    await harness.run(args.sessions, args.concurrency, args.users or args.sessions)
+    elapsed = time.perf_counter() - started
+    # Досылаем очередь журнала, чтобы её запросы тоже попали в счёт
+    await journal_queue.stop()
+    queue_dir.cleanup()
+
+    round_trips = fake_pool.round_trips if fake_pool else counter["round_trips"]
+    updates = sum(len(samples) for samples in harness.latencies.values())
+    all_samples = sorted(sample for samples in harness.latencies.values() for sample in samples)
+
+    print(f"сессий: {args.sessions}, параллельно: {args.concurrency}, апдейтов: {updates}, ошибок: {harness.errors}")
+    print(f"время: {elapsed:.2f} с, {updates / elapsed:.0f} апдейтов/с, {args.sessions / elapsed:.1f} сессий/с")
+    print(f"БД: {'Postgres' if args.postgres else f'in-memory (задержка {args.db_latency_ms} ms)'}, "
+          f"FSM: {args.fsm}, запросов к БД на сессию: {round_trips / args.sessions:.1f}")
+    print(f"вызовов Bot API на сессию: {sum(fake.calls.values()) / args.sessions:.1f}")
+    print()
+    print(f"{'шаг':<16}{'p50, ms':>10}{'p95, ms':>10}{'p99, ms':>10}{'n':>8}")
+    for step in dict.fromkeys(step for step, _, _ in SESSION_SCRIPT):
+        samples = sorted(harness.latencies[step])
+        print(f"{step:<16}{statistics.median(samples):>10.2f}{percentile(samples, 0.95):>10.2f}"
+              f"{percentile(samples, 0.99):>10.2f}{len(samples):>8}")
+    print(f"{'всего':<16}{statistics.median(all_samples):>10.2f}{percentile(all_samples, 0.95):>10.2f}"
+          f"{percentile(all_samples, 0.99):>10.2f}{len(all_samples):>8}")
+    if fake_pool and args.verbose:
+        print()
+        for query, count in fake_pool.queries.most_common():
+            print(f"{count / args.sessions:>6.2f}  {query}")
+
+    await bot.session.close()
+    await runner.cleanup()
+    await database.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=0, help="разных пользователей (0 — по одному на сессию)")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    parser.add_argument("--postgres", action="store_true", help="локальный Postgres из DATABASE_URL")
+    parser.add_argument("--fsm", choices=["memory", "postgres"], default="memory")
+    parser.add_argument("--telegram-port", type=int, default=FAKE_TELEGRAM_PORT)
+    parser.add_argument("--verbose", action="store_true", help="запросы к in-memory БД по типам")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,116 @@
+# benchmarks/fake_database.py
+# In-memory замена пула asyncpg для нагрузочных тестов: настоящий database.py,
+# но каждое обращение к «БД» только считается (и, по желанию, ждёт заданную задержку сети)
+
+import asyncio
+from collections import Counter
+
+import database
+
+
+class FakeTransaction:
+    def __init__(self, conn: "FakeConnection"):
+        self.conn = conn
+
+    async def __aenter__(self):
+        await self.conn._round_trip("BEGIN")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.conn._round_trip("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+class FakeConnection:
+    def __init__(self, pool: "FakePool"):
+        self.pool = pool
+
+    async def _round_trip(self, query: str):
+        self.pool.round_trips += 1
+        self.pool.queries[" ".join(query.split())[:60]] += 1
+        if self.pool.latency:
+            await asyncio.sleep(self.pool.latency)
+
+    def transaction(self) -> FakeTransaction:
+        return FakeTransaction(self)
+
+    async def execute(self, query: str, *args):
+        await self._round_trip(query)
+        if "INSERT INTO user_profiles" in query:
+            self.pool.profiles[args[0]] = args[1]
+        return "OK"
+
+    # executemany — один round trip на весь пакет (как pipeline в asyncpg)
+    async def executemany(self, query: str, args):
+        await self._round_trip(query)
+        if "INSERT INTO temp_journal" in query:
+            self.pool.journal_rows += len(args)
+
+    async def fetch(self, query: str, *args):
+        await self._round_trip(query)
+        return []
+
+    async def fetchrow(self, query: str, *args):
+        await self._round_trip(query)
+        if "FROM user_profiles" in query and args[0] in self.pool.profiles:
+            return {"coffeeshop_code": self.pool.profiles[args[0]]}
+        return None
+
+    async def fetchval(self, query: str, *args):
+        await self._round_trip(query)
+        if "INSERT INTO journal_saves" in query:
+            if args[0] in self.pool.saves:
+                return None
+            self.pool.saves.add(args[0])
+            return True
+        if "EXISTS" in query:
+            return False
+        return None
+
+
+class FakeAcquire:
+    def __init__(self, pool: "FakePool"):
+        self.pool = pool
+
+    async def __aenter__(self) -> FakeConnection:
+        self.pool.acquires += 1
+        return FakeConnection(self.pool)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class FakePool:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.round_trips = 0
+        self.acquires = 0
+        self.queries: Counter[str] = Counter()
+        self.profiles: dict[int, str] = {}
+        self.saves: set[str] = set()
+        self.journal_rows = 0
+
+    def acquire(self, timeout: float | None = None) -> FakeAcquire:
+        return FakeAcquire(self)
+
+    def get_size(self) -> int:
+        return 1
+
+    def get_idle_size(self) -> int:
+        return 1
+
+    def get_min_size(self) -> int:
+        return 1
+
+    def get_max_size(self) -> int:
+        return 1
+
+    async def close(self):
+        pass
+
+
+# Подменяем пул в database.py: все функции модуля работают как есть
+def install(latency_ms: float = 0.0) -> FakePool:
+    pool = FakePool(latency_ms)
+    database._pool = pool
+    return pool
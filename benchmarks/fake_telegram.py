@@ -0,0 +1,53 @@
+# benchmarks/fake_telegram.py
+# Фейковый Telegram Bot API: отвечает на любые методы, ничего никуда не отправляет
+#
+# Запуск: python -m benchmarks.fake_telegram  (порт FAKE_TELEGRAM_PORT, по умолчанию 8081)
+# Бот подключается к нему через TELEGRAM_API_URL=http://127.0.0.1:8081
+
+import itertools
+import os
+import time
+
+from aiohttp import web
+
+FAKE_TELEGRAM_PORT = int(os.getenv("FAKE_TELEGRAM_PORT", "8081"))
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Журнал температур", "username": "fake_bot"}
+
+
+class FakeTelegram:
+    def __init__(self):
+        self.message_ids = itertools.count(1)
+        self.calls: dict[str, int] = {}
+
+    def _message(self, params) -> dict:
+        chat_id = int(params.get("chat_id") or 0)
+        return {
+            "message_id": next(self.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": params.get("text", ""),
+        }
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] = self.calls.get(method, 0) + 1
+        params = await request.post()
+
+        if method == "getMe":
+            result = BOT_USER
+        elif method.startswith("send") or method.startswith("edit"):
+            result = self._message(params)
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+
+if __name__ == "__main__":
+    web.run_app(FakeTelegram().app(), host="127.0.0.1", port=FAKE_TELEGRAM_PORT)
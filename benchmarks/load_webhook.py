@@ -0,0 +1,72 @@
+# benchmarks/load_webhook.py
+# Нагрузочный тест webhook: шлём синтетические апдейты на локальный сервер бота
+#
+# 1. python -m benchmarks.fake_telegram
+# 2. BOT_MODE=webhook TELEGRAM_API_URL=http://127.0.0.1:8081 WEBHOOK_PORT=8080 python bot_barista.py
+# 3. python -m benchmarks.load_webhook --updates 5000 --concurrency 100
+
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import time
+
+import aiohttp
+
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+
+
+def make_update(update_id: int, user_id: int, text: str) -> dict:
+    user = {"id": user_id, "is_bot": False, "first_name": "Бариста"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": user,
+            "text": text,
+        },
+    }
+
+
+async def main(url: str, updates: int, concurrency: int, users: int):
+    headers = {"X-Telegram-Bot-Api-Secret-Token": WEBHOOK_SECRET} if WEBHOOK_SECRET else {}
+    update_ids = itertools.count(1)
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def post(session: aiohttp.ClientSession, i: int):
+        nonlocal errors
+        async with semaphore:
+            update = make_update(next(update_ids), 10_000 + i % users, "/start")
+            started = time.perf_counter()
+            async with session.post(url, json=update, headers=headers) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(post(session, i) for i in range(updates)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"апдейтов: {updates}, ошибок: {errors}, время: {elapsed:.2f} с, "
+          f"{updates / elapsed:.0f} апдейтов/с")
+    print(f"ответ webhook: p50={statistics.median(latencies):.1f} ms, "
+          f"p95={latencies[int(len(latencies) * 0.95)]:.1f} ms, "
+          f"p99={latencies[int(len(latencies) * 0.99)]:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8080/webhook")
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.updates, args.concurrency, args.users))
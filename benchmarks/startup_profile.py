@@ -0,0 +1,72 @@
+# benchmarks/startup_profile.py
+# Стоимость импортов при холодном старте: python -X importtime, сводка по пакетам и модулям
+#
+# Запуск: python -m benchmarks.startup_profile [--module bot_barista] [--runs 5] [--top 15]
+# Время шагов main() и до первого апдейта: STARTUP_PROFILE=1 python bot_barista.py (см. startup.py)
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile_once(module: str) -> list[tuple[str, int, int, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def main(module: str, runs: int, top: int):
+    # Первый прогон прогревает .pyc и файловый кэш — его не считаем
+    profile_once(module)
+    totals = []
+    self_times: dict[str, list[int]] = defaultdict(list)
+    package_times: dict[str, list[int]] = defaultdict(list)
+    for _ in range(runs):
+        rows = profile_once(module)
+        totals.append(next(cumulative for name, _, cumulative, depth in rows if name == module))
+        per_package: dict[str, int] = defaultdict(int)
+        for name, self_us, _, _ in rows:
+            self_times[name].append(self_us)
+            per_package[name.split(".")[0]] += self_us
+        for package, us in per_package.items():
+            package_times[package].append(us)
+
+    print(f"import {module}: медиана {statistics.median(totals) / 1000:.0f} ms "
+          f"(мин {min(totals) / 1000:.0f}, макс {max(totals) / 1000:.0f}), прогонов: {runs}")
+
+    print("\nПо пакетам (собственное время всех модулей):")
+    for package, samples in sorted(package_times.items(), key=lambda item: -statistics.median(item[1]))[:top]:
+        print(f"{statistics.median(samples) / 1000:>9.1f} ms  {package}")
+
+    local = {
+        os.path.splitext(entry)[0] for entry in os.listdir(ROOT)
+        if entry.endswith(".py") or os.path.isdir(os.path.join(ROOT, entry))
+    }
+    print("\nМодули проекта:")
+    for name, samples in sorted(self_times.items(), key=lambda item: -statistics.median(item[1])):
+        if name.split(".")[0] in local:
+            print(f"{statistics.median(samples) / 1000:>9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="bot_barista")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    main(args.module, args.runs, args.top)
@@ -1,50 +1,149 @@
 # bot_barista.py
 
+# Первым делом — отметка времени старта для профиля (STARTUP_PROFILE=1)
+from startup import startup_profile
+
 import asyncio
 import logging
 import os
-from aiogram import Bot, Dispatcher
-from aiogram.client.default import DefaultBotProperties
-from aiogram.fsm.storage.memory import MemoryStorage
-from aiogram.types import BotCommand
 from dotenv import load_dotenv
 
-from handlers import start, temperature
-from scheduler import start_scheduler
-
+# .env читаем до импорта модулей, которые берут настройки из окружения при импорте
 load_dotenv()
 
+from aiogram import Bot, Dispatcher  # noqa: E402
+from aiogram.client.default import DefaultBotProperties  # noqa: E402
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer  # noqa: E402
+from aiogram.fsm.storage.base import BaseStorage  # noqa: E402
+from aiogram.types import BotCommand  # noqa: E402
+
+from anomalies import register_alert_handler  # noqa: E402
+from catalogue import catalogue  # noqa: E402
+from cluster import cluster  # noqa: E402
+from database import init_pool, close_pool, log_pool_stats, warm_anomaly_detector  # noqa: E402
+from migrate import DB_MIGRATE_ON_START, maintain_journal_partitions, migrate  # noqa: E402
+from fsm_storage import KeyedEventIsolation, create_storage  # noqa: E402
+from handlers import admin, start, temperature  # noqa: E402
+from journal_queue import journal_queue  # noqa: E402
+from reports import report_service  # noqa: E402
+from logging_setup import setup_logging  # noqa: E402
+from metrics import start_metrics_server  # noqa: E402
+from middlewares.log_context import setup_log_context  # noqa: E402
+from middlewares.metrics import setup_metrics  # noqa: E402
+from middlewares.session import setup_session  # noqa: E402
+from middlewares.debounce import setup_debounce  # noqa: E402
+from scheduler import start_scheduler  # noqa: E402
+from utils.keyboards import KeyboardAwareSession  # noqa: E402
+
+startup_profile.mark("импорты")
+
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+BOT_MODE = os.getenv("BOT_MODE", "polling")  # polling / webhook
+# Свой адрес Bot API (локальный сервер или фейковый API для нагрузочных тестов)
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
 
 
-async def main():
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s | %(levelname)s | %(name)s | %(message)s',
-        handlers=[
-            logging.FileHandler("bot.log", encoding="utf-8"),
-            logging.StreamHandler()
-        ]
-    )
+def create_bot() -> Bot:
+    # Сессия отправляет готовый JSON статичных клавиатур без повторной сериализации
+    api = TelegramAPIServer.from_base(TELEGRAM_API_URL) if TELEGRAM_API_URL else PRODUCTION
+    session = KeyboardAwareSession(api=api)
+    return Bot(token=BOT_TOKEN, session=session, default=DefaultBotProperties(parse_mode="HTML"))
+
 
-    bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode="HTML"))
-    dp = Dispatcher(storage=MemoryStorage())
+# Диспетчер с роутерами и middleware — тот же, что гоняет нагрузочный тест (benchmarks/e2e_load.py)
+def create_dispatcher(bot: Bot, storage: BaseStorage | None = None) -> Dispatcher:
+    # Хранилище FSM выбирается через FSM_STORAGE (memory / postgres)
+    # Апдейты одного пользователя — по очереди: состояние FSM читается уже под замком
+    dp = Dispatcher(storage=storage or create_storage(), events_isolation=KeyedEventIsolation())
 
     # Регистрация роутеров
     dp.include_routers(
+        admin.router,
         start.router,
         temperature.router,
     )
 
+    # Данные сессии бариста: одно чтение и одна запись FSM на апдейт
+    setup_session(start.router, temperature.router)
+
+    # update_id, user_id и обработчик в каждой записи лога
+    setup_log_context(dp, admin.router, start.router, temperature.router)
+
+    # Метрики задержек: апдейты, обработчики, Telegram API
+    setup_metrics(dp, bot, {
+        "admin": admin.router,
+        "start": start.router,
+        "temperature": temperature.router,
+    })
+
+    # Повторные нажатия кнопок отбрасываются до замка пользователя
+    setup_debounce(dp)
+    return dp
+
+
+# Необязательные шаги старта — в фоне, ошибка пишется в лог и не роняет бота
+def run_in_background(coro, name: str) -> asyncio.Task:
+    def done(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"[STARTUP] {name}: {task.exception()!r}")
+    task = asyncio.create_task(coro, name=name)
+    task.add_done_callback(done)
+    return task
+
+
+async def main():
+    # Логи пишет отдельный поток: диск и консоль не тормозят обработку апдейтов
+    log_listener = setup_logging()
+
+    # Общий пул соединений с БД на всё время работы бота
+    await init_pool()
+    startup_profile.mark("пул БД")
+    # Схема БД: новые миграции и партиции журнала на ближайшие месяцы (одна реплика за раз)
+    if DB_MIGRATE_ON_START:
+        await migrate()
+        await maintain_journal_partitions(retention_months=0)
+        startup_profile.mark("миграции")
+    # Независимые шаги — параллельно:
+    # реплики (лидер для cron-задач и кольцо пользователей для таймеров, CLUSTER_ENABLED=1)
+    # и справочник кофеен (из БД в индекс для поиска)
+    await asyncio.gather(cluster.start(), catalogue.load())
+    startup_profile.mark("кластер и справочник")
+
+    bot = create_bot()
+    # Выход температуры за пределы — сразу сообщение в чат менеджеров
+    register_alert_handler(bot)
+    # Норма устройств прогревается в фоне: пока она не готова, показания проверяются только по порогам
+    run_in_background(warm_anomaly_detector(), "warm_anomaly_detector")
+    # Локальная очередь журнала: досылает в БД сессии, сохранённые до перезапуска
+    await journal_queue.start()
+    dp = create_dispatcher(bot)
+    if startup_profile.enabled:
+        dp.update.outer_middleware(startup_profile.first_update_middleware)
+
     # Запуск планировщика
-    start_scheduler(bot, dp)
+    await start_scheduler(bot, dp)
+    startup_profile.mark("очередь, диспетчер и планировщик")
 
-    # Команды бота
-    await bot.set_my_commands([
+    # Команды бота: лишний запрос к Bot API не задерживает приём апдейтов
+    run_in_background(bot.set_my_commands([
         BotCommand(command="start", description="Заполнить журнал температур")
-    ])
+    ]), "set_my_commands")
+    startup_profile.report("Бот готов к приёму апдейтов")
 
-    await dp.start_polling(bot)
+    try:
+        if BOT_MODE == "webhook":
+            from webhook import run_webhook
+            await run_webhook(dp, bot)
+        else:
+            await start_metrics_server()
+            await dp.start_polling(bot)
+    finally:
+        await journal_queue.stop()
+        report_service.shutdown()
+        await cluster.stop()
+        log_pool_stats()
+        await close_pool()
+        log_listener.stop()
 
 
 if __name__ == "__main__":
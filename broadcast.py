@@ -0,0 +1,153 @@
+# broadcast.py
+# Массовая рассылка: параллельная отправка с ограничением скорости под лимиты Telegram
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+from aiogram.types import InlineKeyboardMarkup
+
+# Лимиты Telegram: ~30 сообщений в секунду всего и ~1 в секунду в один чат
+BROADCAST_GLOBAL_RATE = float(os.getenv("BROADCAST_GLOBAL_RATE", "30"))
+BROADCAST_PER_CHAT_RATE = float(os.getenv("BROADCAST_PER_CHAT_RATE", "1"))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "25"))
+BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", "3"))
+
+
+# Token bucket: rate токенов в секунду, не больше capacity за раз
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    # Пауза всей корзины: после неё токены копятся заново, без всплеска накопленных отправок
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+        self.updated = self.paused_until
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# Итоги одного прогона рассылки
+@dataclass
+class BroadcastStats:
+    total: int = 0
+    sent: int = 0
+    blocked: int = 0
+    failed: int = 0
+    retried: int = 0
+    duration: float = 0.0
+    blocked_users: list[int] = field(default_factory=list)
+
+    def __str__(self):
+        return (
+            f"всего={self.total}, отправлено={self.sent}, заблокировали={self.blocked}, "
+            f"ошибок={self.failed}, повторов={self.retried}, время={self.duration:.2f} с"
+        )
+
+
+class Broadcaster:
+    def __init__(
+        self,
+        bot: Bot,
+        global_rate: float = BROADCAST_GLOBAL_RATE,
+        per_chat_rate: float = BROADCAST_PER_CHAT_RATE,
+        concurrency: int = BROADCAST_CONCURRENCY,
+        max_retries: int = BROADCAST_MAX_RETRIES,
+    ):
+        self.bot = bot
+        self.global_bucket = TokenBucket(global_rate)
+        self.per_chat_rate = per_chat_rate
+        self.chat_buckets: dict[int, TokenBucket] = {}
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.max_retries = max_retries
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, capacity=1)
+        return bucket
+
+    # Отправка одному получателю; ошибки одного чата не влияют на остальных
+    async def _send_one(self, chat_id: int, text: str, reply_markup, stats: BroadcastStats):
+        async with self.semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self._chat_bucket(chat_id).acquire()
+                await self.global_bucket.acquire()
+                try:
+                    await self.bot.send_message(chat_id, text, reply_markup=reply_markup)
+                    stats.sent += 1
+                    return
+                except TelegramRetryAfter as e:
+                    stats.retried += 1
+                    logging.warning(f"[BROADCAST] RetryAfter {e.retry_after} с для chat_id={chat_id}")
+                    # Флуд-лимит Telegram общий на бота: ждут все отправки, а не только этот чат
+                    self.global_bucket.pause(e.retry_after)
+                except TelegramForbiddenError:
+                    stats.blocked += 1
+                    stats.blocked_users.append(chat_id)
+                    logging.info(f"[BROADCAST] chat_id={chat_id} заблокировал бота")
+                    return
+                except TelegramBadRequest as e:
+                    stats.failed += 1
+                    logging.warning(f"[BROADCAST] chat_id={chat_id}: {e.message}")
+                    return
+                except TelegramAPIError as e:
+                    if attempt == self.max_retries:
+                        break
+                    stats.retried += 1
+                    logging.warning(f"[BROADCAST] chat_id={chat_id}: {e}, повтор")
+                    await asyncio.sleep(2 ** attempt)
+            stats.failed += 1
+            logging.error(f"[BROADCAST] chat_id={chat_id}: не удалось отправить")
+
+    # Рассылка, где у каждого получателя свой текст
+    async def broadcast_messages(
+        self,
+        messages: Iterable[tuple[int, str]],
+        reply_markup: InlineKeyboardMarkup | None = None,
+    ) -> BroadcastStats:
+        messages = list(messages)
+        stats = BroadcastStats(total=len(messages))
+        started = time.monotonic()
+        await asyncio.gather(*(self._send_one(chat_id, text, reply_markup, stats) for chat_id, text in messages))
+        stats.duration = time.monotonic() - started
+        self.chat_buckets.clear()
+        logging.info(f"[BROADCAST] {stats}")
+        return stats
+
+
+# Короткий вход для разовой рассылки
+async def broadcast_messages(
+    bot: Bot,
+    messages: Iterable[tuple[int, str]],
+    reply_markup: InlineKeyboardMarkup | None = None,
+) -> BroadcastStats:
+    return await Broadcaster(bot).broadcast_messages(messages, reply_markup)
@@ -0,0 +1,78 @@
+# cache.py
+# Небольшой in-process кэш с TTL и вытеснением по LRU (профили и mute-статус пользователей, графики отчётов)
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+CACHE_TTL = float(os.getenv("CACHE_TTL", "600"))
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "10000"))
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "200"))
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", "172800"))
+
+MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, name: str, max_size: int = CACHE_MAX_SIZE, ttl: float = CACHE_TTL):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        CACHES.append(self)
+
+    def __len__(self):
+        return len(self.data)
+
+    # Возвращает MISSING, если значения нет или оно устарело (None — тоже валидное значение)
+    def get(self, key: Hashable) -> Any:
+        item = self.data.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self.data[key]
+            self.misses += 1
+            return MISSING
+        self.data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: Hashable, value: Any):
+        self.data[key] = (time.monotonic() + self.ttl, value)
+        self.data.move_to_end(key)
+        while len(self.data) > self.max_size:
+            self.data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        self.data.pop(key, None)
+
+    def clear(self):
+        self.data.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hit_rate, 3),
+        }
+
+
+CACHES: list[TTLCache] = []
+
+# user_id -> код кофейни (или None, если ещё не выбрана)
+profile_cache = TTLCache("user_profiles")
+# user_id -> отключены ли уведомления
+mute_cache = TTLCache("mute_users")
+# (кофейня, дата, число показаний) -> готовый график дневного отчёта
+report_cache = TTLCache("reports", max_size=REPORT_CACHE_SIZE, ttl=REPORT_CACHE_TTL)
@@ -0,0 +1,129 @@
+# catalogue.py
+# Справочник кофеен: таблица coffee_shops в БД, в памяти — индекс для поиска по коду и названию
+
+import logging
+import re
+from dataclasses import dataclass
+
+from database import load_coffee_shops
+
+# Исходный список кофеен: им заполняется таблица coffee_shops (migrations/005),
+# он же используется, если таблица ещё пустая
+COFFEE_LIST = [
+    "Москва 0-1 (Омега Плаза)",
+    "Москва 0-10 (Магистраль Плаза)",
+    "Москва 0-11 (Симонов Плаза)",
+    "Москва 0-12 (Арма)",
+    "Москва 0-13 (Смарт Парк)",
+    "Москва 0-14 (Верейская Плаза)",
+    "Москва 0-15 (Сретенка)",
+    "Москва 0-15.1 (Учебный Центр)",
+    "Москва 0-16.5 (Т-Банк | 5 этаж)",
+    "Москва 0-16.7 (Т-Банк | 7 этаж)",
+    "Москва 0-16.9 (Т-Банк | 9 этаж)",
+    "Москва 0-17 (Хлебозавод)",
+    "Москва 0-18 (Альфа-Банк Паскаль)",
+    "Москва 0-19 (Солнце Москвы)",
+    "Москва 0-2 (Сити-Федерация)",
+    "Москва 0-21.4 (Центральный Университет | 4 этаж)",
+    "Москва 0-21.8 (Центральный Университет | 8 этаж)",
+    "Москва 0-22 (РИО)",
+    "Москва 0-23 (ВЭБ Центр)",
+    "Москва 0-24 (Поклонка Плейс Остров)",
+    "Москва 0-27 (Альфа-Банк Немецкий центр)",
+    "Москва 0-3 (Даймонд Холл)",
+    "Москва 0-30 (Афимолл Галерея)"
+]
+
+# Минимальная длина префикса, которая попадает в индекс
+MIN_PREFIX = 1
+TOKEN_RE = re.compile(r"[^\s()|,]+")
+
+
+@dataclass(frozen=True)
+class CoffeeShop:
+    id: int
+    name: str  # Полное название, например "Москва 0-16.5 (Т-Банк | 5 этаж)"
+
+    # Код кофейни без города, как в temp_journal.coffeeshop_id
+    @property
+    def code(self) -> str:
+        return self.name.replace("Москва ", "")
+
+
+def _tokens(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower().replace("ё", "е"))
+
+
+class Catalogue:
+    def __init__(self, shops: list[CoffeeShop] | None = None):
+        self.shops: list[CoffeeShop] = []
+        self.by_id: dict[int, CoffeeShop] = {}
+        # префикс слова -> id кофеен, в названии которых есть слово с таким префиксом
+        self.prefix_index: dict[str, set[int]] = {}
+        # Меняется при каждой перезагрузке — по нему сбрасываются кэши клавиатур
+        self.version = 0
+        self.replace(shops or seed_shops())
+
+    def replace(self, shops: list[CoffeeShop]):
+        self.shops = list(shops)
+        self.by_id = {shop.id: shop for shop in self.shops}
+        index: dict[str, set[int]] = {}
+        for shop in self.shops:
+            for token in _tokens(shop.name):
+                for end in range(MIN_PREFIX, len(token) + 1):
+                    index.setdefault(token[:end], set()).add(shop.id)
+        self.prefix_index = index
+        self.version += 1
+
+    def __len__(self):
+        return len(self.shops)
+
+    def get(self, shop_id: int) -> CoffeeShop | None:
+        return self.by_id.get(shop_id)
+
+    # Поиск: каждое слово запроса — префикс какого-то слова в названии;
+    # если по префиксам ничего нет, ищем подстроку во всём названии
+    def search(self, query: str, limit: int = 10) -> list[CoffeeShop]:
+        tokens = _tokens(query)
+        if not tokens:
+            return []
+        ids: set[int] | None = None
+        for token in tokens:
+            found = self.prefix_index.get(token, set())
+            ids = found if ids is None else ids & found
+            if not ids:
+                break
+        if ids:
+            matches = [self.by_id[i] for i in ids]
+        else:
+            needle = " ".join(tokens)
+            matches = [shop for shop in self.shops if needle in " ".join(_tokens(shop.name))]
+        # Точное совпадение кода ("0-2") — первым
+        matches.sort(key=lambda shop: (_tokens(shop.code)[0] != tokens[0], shop.id))
+        return matches[:limit]
+
+    # Одна кофейня по запросу: единственное совпадение или точный код ("0-1", а не "0-10"); иначе None
+    def resolve(self, query: str) -> CoffeeShop | None:
+        matches = self.search(query, limit=2)
+        if not matches:
+            return None
+        if len(matches) == 1 or _tokens(matches[0].code)[0] == _tokens(query)[0]:
+            return matches[0]
+        return None
+
+    async def load(self):
+        shops = [CoffeeShop(id=row["id"], name=row["name"]) for row in await load_coffee_shops()]
+        if shops:
+            self.replace(shops)
+        else:
+            logging.warning("[CATALOGUE] Таблица coffee_shops пуста — используем встроенный список")
+        logging.info(f"[CATALOGUE] Загружено кофеен: {len(self.shops)}")
+
+
+# id совпадает с порядком в COFFEE_LIST (так же заполняется таблица)
+def seed_shops() -> list[CoffeeShop]:
+    return [CoffeeShop(id=i, name=name) for i, name in enumerate(COFFEE_LIST, start=1)]
+
+
+catalogue = Catalogue()
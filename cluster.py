@@ -0,0 +1,158 @@
+# cluster.py
+# Несколько реплик бота на одной БД: cron-задачи выполняет только лидер (advisory-lock в Postgres),
+# таймеры сессий распределяются по живым репликам согласованным хешированием user_id.
+# Замок лидера и LISTEN держатся на сессии — соединение идёт по DATABASE_DIRECT_URL, а не через pgbouncer
+
+import asyncio
+import bisect
+import hashlib
+import logging
+import os
+import socket
+from functools import wraps
+from typing import Awaitable, Callable
+
+import asyncpg
+
+from database import SESSION_TIMERS_CHANNEL, connect, delete_replica, heartbeat_replica, load_live_replicas
+
+CLUSTER_ENABLED = os.getenv("CLUSTER_ENABLED", "0") == "1"
+REPLICA_ID = os.getenv("REPLICA_ID") or f"{socket.gethostname()}-{os.getpid()}"
+CLUSTER_HEARTBEAT = float(os.getenv("CLUSTER_HEARTBEAT", "10"))
+# Реплика без отметки дольше этого считается упавшей
+CLUSTER_REPLICA_TTL = float(os.getenv("CLUSTER_REPLICA_TTL", "30"))
+CLUSTER_VNODES = int(os.getenv("CLUSTER_VNODES", "64"))
+# Ключ advisory-lock лидера (любое число, одинаковое у всех реплик)
+LEADER_LOCK_KEY = int(os.getenv("LEADER_LOCK_KEY", "7305011"))
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+# Кольцо согласованного хеширования: при добавлении реплики переезжает ~1/N пользователей
+class HashRing:
+    def __init__(self, replicas: list[str], vnodes: int = CLUSTER_VNODES):
+        self.replicas = sorted(replicas)
+        points = sorted((_hash(f"{replica}#{i}"), replica) for replica in self.replicas for i in range(vnodes))
+        self.hashes = [point for point, _ in points]
+        self.owners = [replica for _, replica in points]
+
+    def owner(self, user_id: int) -> str | None:
+        if not self.hashes:
+            return None
+        index = bisect.bisect(self.hashes, _hash(str(user_id))) % len(self.hashes)
+        return self.owners[index]
+
+
+class Cluster:
+    def __init__(self, replica_id: str = REPLICA_ID, enabled: bool = CLUSTER_ENABLED):
+        self.replica_id = replica_id
+        self.enabled = enabled
+        self.ring = HashRing([replica_id])
+        self.conn: asyncpg.Connection | None = None
+        self.leader = not enabled
+        self.task: asyncio.Task | None = None
+        # Вызывается при изменении состава реплик (перераспределение таймеров)
+        self.on_ring_change: Callable[[], Awaitable[None]] | None = None
+        # Уведомления о таймерах с других реплик: (user_id, due | None)
+        self.on_timer_notify: Callable[[int, float | None], None] | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.leader
+
+    def owns(self, user_id: int) -> bool:
+        return not self.enabled or self.ring.owner(user_id) == self.replica_id
+
+    async def start(self):
+        if not self.enabled:
+            return
+        await self._tick()
+        self.task = asyncio.create_task(self._run())
+        logging.info(f"[CLUSTER] Реплика {self.replica_id} запущена, реплик: {len(self.ring.replicas)}")
+
+    async def stop(self):
+        if not self.enabled:
+            return
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        await self._close_connection()
+        await delete_replica(self.replica_id)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(CLUSTER_HEARTBEAT)
+            try:
+                await self._tick()
+            except Exception:
+                logging.exception("[CLUSTER] Ошибка heartbeat")
+
+    async def _tick(self):
+        await heartbeat_replica(self.replica_id)
+        reconnected = await self._ensure_connection()
+        await self._elect()
+
+        replicas = await load_live_replicas(CLUSTER_REPLICA_TTL)
+        if self.replica_id not in replicas:
+            replicas.append(self.replica_id)
+        changed = sorted(replicas) != self.ring.replicas
+        if changed:
+            logging.info(f"[CLUSTER] Состав реплик изменился: {self.ring.replicas} → {sorted(replicas)}")
+            self.ring = HashRing(replicas)
+        # После переподключения NOTIFY могли потеряться — сверяемся с БД так же, как при смене состава
+        if (changed or reconnected) and self.on_ring_change is not None:
+            await self.on_ring_change()
+
+    # Соединение для лока лидера и LISTEN; при его потере Postgres сам отпускает лок
+    async def _ensure_connection(self) -> bool:
+        if self.conn is not None and not self.conn.is_closed():
+            try:
+                await self.conn.execute("SELECT 1")
+                return False
+            except Exception:
+                logging.warning("[CLUSTER] Соединение лидера потеряно")
+        await self._close_connection()
+        self.conn = await connect()
+        await self.conn.add_listener(SESSION_TIMERS_CHANNEL, self._on_notify)
+        return True
+
+    async def _close_connection(self):
+        if self.leader and self.enabled:
+            logging.info(f"[CLUSTER] Реплика {self.replica_id} больше не лидер")
+        self.leader = not self.enabled
+        if self.conn is not None:
+            try:
+                await self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
+
+    async def _elect(self):
+        if self.leader:
+            return
+        self.leader = await self.conn.fetchval("SELECT pg_try_advisory_lock($1)", LEADER_LOCK_KEY)
+        if self.leader:
+            logging.info(f"[CLUSTER] Реплика {self.replica_id} стала лидером")
+
+    # Полезная нагрузка: "<реплика> <user_id> <due | ->"
+    def _on_notify(self, conn, pid, channel, payload: str):
+        origin, user_id, due = payload.split()
+        if origin == self.replica_id or self.on_timer_notify is None:
+            return
+        self.on_timer_notify(int(user_id), None if due == "-" else float(due))
+
+
+# Cron-задачи: на всех репликах в расписании, выполняет только лидер
+def leader_only(func):
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not cluster.is_leader:
+            logging.debug(f"[CLUSTER] {func.__name__}: не лидер, пропускаем")
+            return None
+        return await func(*args, **kwargs)
+    return wrapper
+
+
+cluster = Cluster()
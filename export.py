@@ -0,0 +1,83 @@
+# export.py
+# Выгрузка журнала температур в CSV / XLSX для проверок: строки идут из БД кусками,
+# файл пишется на диск по мере чтения, поэтому память не растёт с длиной периода
+
+import asyncio
+import csv
+import os
+import tempfile
+from datetime import date
+
+import asyncpg
+
+from database import get_connection, iter_journal_chunks
+
+EXPORT_DIR = os.getenv("EXPORT_DIR") or tempfile.gettempdir()
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+
+JOURNAL_HEADER = ["Дата", "Время", "Кофейня", "Устройство", "Номер", "Температура", "Бариста"]
+
+
+def _format_row(row: asyncpg.Record) -> list:
+    return [
+        row["date"].isoformat(),
+        row["time"].isoformat(),
+        row["coffeeshop_id"],
+        row["device_type"],
+        row["device_number"],
+        row["temperature"],
+        row["barista"],
+    ]
+
+
+async def write_journal_csv(
+    conn: asyncpg.Connection, path: str, date_from: date, date_to: date, shop_code: str | None = None
+) -> int:
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        # Разделитель ";" — так файл сразу открывается в русском Excel
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(JOURNAL_HEADER)
+        async for chunk in iter_journal_chunks(conn, date_from, date_to, shop_code, EXPORT_CHUNK_SIZE):
+            rows = [_format_row(row) for row in chunk]
+            # Запись на диск — в отдельном потоке, чтобы не тормозить обработку апдейтов
+            await asyncio.to_thread(writer.writerows, rows)
+            count += len(rows)
+    return count
+
+
+async def write_journal_xlsx(
+    conn: asyncpg.Connection, path: str, date_from: date, date_to: date, shop_code: str | None = None
+) -> int:
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError("Для выгрузки в XLSX нужен пакет openpyxl")
+
+    # write_only: строки сразу сбрасываются во временный файл, а не держатся в памяти
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Журнал")
+    sheet.append(JOURNAL_HEADER)
+    count = 0
+    async for chunk in iter_journal_chunks(conn, date_from, date_to, shop_code, EXPORT_CHUNK_SIZE):
+        for row in chunk:
+            sheet.append(_format_row(row))
+        count += len(chunk)
+    await asyncio.to_thread(workbook.save, path)
+    return count
+
+
+# Выгрузка во временный файл; возвращает путь и число строк (файл удаляет вызывающий)
+async def export_journal(
+    date_from: date, date_to: date, shop_code: str | None = None, fmt: str = "csv"
+) -> tuple[str, int]:
+    writer = write_journal_xlsx if fmt == "xlsx" else write_journal_csv
+    fd, path = tempfile.mkstemp(prefix="journal_", suffix=f".{fmt}", dir=EXPORT_DIR)
+    os.close(fd)
+    try:
+        async with get_connection() as conn:
+            count = await writer(conn, path, date_from, date_to, shop_code)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, count
@@ -0,0 +1,110 @@
+# fsm_session.py
+# Данные незавершённой сессии бариста: читаются из FSM один раз за апдейт,
+# меняются в памяти и записываются одним вызовом вместе со сменой состояния
+
+from typing import Any
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+
+
+class BaristaSession:
+    __slots__ = (
+        "state",
+        "coffee_code",
+        "entries",
+        "fridge_count",
+        "freezer_count",
+        "current_type",
+        "barista_name",
+        "extra",
+        "_data_changed",
+        "_state_changed",
+    )
+
+    FIELDS = ("coffee_code", "entries", "fridge_count", "freezer_count", "current_type", "barista_name")
+
+    def __init__(self, state: str | None = None, data: dict[str, Any] | None = None):
+        data = dict(data or {})
+        object.__setattr__(self, "state", state)
+        object.__setattr__(self, "coffee_code", data.pop("coffee_code", None))
+        object.__setattr__(self, "entries", data.pop("entries", None) or [])
+        object.__setattr__(self, "fridge_count", data.pop("fridge_count", 0))
+        object.__setattr__(self, "freezer_count", data.pop("freezer_count", 0))
+        object.__setattr__(self, "current_type", data.pop("current_type", None))
+        object.__setattr__(self, "barista_name", data.pop("barista_name", None))
+        # Ключи, о которых сессия не знает, сохраняем как есть
+        object.__setattr__(self, "extra", data)
+        object.__setattr__(self, "_data_changed", False)
+        object.__setattr__(self, "_state_changed", False)
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name in self.FIELDS:
+            object.__setattr__(self, "_data_changed", True)
+
+    @property
+    def changed(self) -> bool:
+        return self._data_changed or self._state_changed
+
+    @property
+    def total_devices(self) -> int:
+        return self.fridge_count + self.freezer_count
+
+    def set_state(self, state: State | str | None):
+        object.__setattr__(self, "state", state.state if isinstance(state, State) else state)
+        object.__setattr__(self, "_state_changed", True)
+
+    # Добавить показание; возвращает номер устройства своего типа
+    def add_entry(self, device_type: str, temp: float) -> int:
+        if device_type == "fridge":
+            self.fridge_count += 1
+            number = self.fridge_count
+        else:
+            self.freezer_count += 1
+            number = self.freezer_count
+        self.entries.append({"type": device_type, "number": number, "temp": temp})
+        object.__setattr__(self, "_data_changed", True)
+        return number
+
+    # Новая сессия для выбранной кофейни
+    def reset(self, coffee_code: str | None = None):
+        self.coffee_code = coffee_code
+        self.entries = []
+        self.fridge_count = 0
+        self.freezer_count = 0
+        self.current_type = None
+        self.barista_name = None
+
+    def clear(self):
+        self.reset()
+        self.extra.clear()
+        self.set_state(None)
+
+    def to_data(self) -> dict[str, Any]:
+        data = dict(self.extra)
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not None and value != [] and value != 0:
+                data[name] = value
+        return data
+
+    @classmethod
+    async def load(cls, storage: BaseStorage, key: StorageKey, raw_state: str | None) -> "BaristaSession":
+        return cls(raw_state, await storage.get_data(key))
+
+    # Одна запись в хранилище: данные и состояние вместе (если хранилище так умеет и состояние менялось)
+    async def flush(self, storage: BaseStorage, key: StorageKey):
+        if not self.changed:
+            return
+        set_state_and_data = getattr(storage, "set_state_and_data", None)
+        # Состояние пишем, только если обработчик его менял: иначе не затираем его прочитанным в начале апдейта
+        if set_state_and_data is not None and self._state_changed:
+            await set_state_and_data(key, self.state, self.to_data())
+        else:
+            if self._data_changed:
+                await storage.set_data(key, self.to_data())
+            if self._state_changed:
+                await storage.set_state(key, self.state)
+        object.__setattr__(self, "_data_changed", False)
+        object.__setattr__(self, "_state_changed", False)
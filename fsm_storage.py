@@ -0,0 +1,214 @@
+# fsm_storage.py
+# Хранилище FSM: выбирается через FSM_STORAGE (memory / postgres)
+
+import asyncio
+import json
+import logging
+import os
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Hashable, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import (
+    BaseEventIsolation,
+    BaseStorage,
+    DefaultKeyBuilder,
+    KeyBuilder,
+    StateType,
+    StorageKey,
+)
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from database import get_connection
+from metrics import db_timed
+
+FSM_STORAGE = os.getenv("FSM_STORAGE", "memory")
+# Брошенные сессии старше TTL считаются пустыми и удаляются фоновой задачей
+FSM_TTL_HOURS = float(os.getenv("FSM_TTL_HOURS", "24"))
+
+# Данные, прочитанные вместе с состоянием в текущем апдейте (ключ -> (замок, JSON))
+_prefetched_data: ContextVar[dict[str, tuple[object, str | None]] | None] = ContextVar(
+    "fsm_prefetched_data", default=None
+)
+# Какой захват замка пользователя сейчас держит этот апдейт (см. KeyedEventIsolation)
+_held_lock: ContextVar[object | None] = ContextVar("fsm_held_lock", default=None)
+
+
+# Замки по ключу: запись живёт, пока замок кто-то держит или ждёт, — словарь не растёт с числом пользователей
+class KeyedLocks:
+    def __init__(self):
+        self._locks: dict[Hashable, list] = {}  # ключ -> [замок, сколько держат и ждут]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+
+# Апдейты одного пользователя в одном чате — по очереди, разных пользователей — параллельно.
+# aiogram берёт замок в FSMContextMiddleware и читает состояние уже под ним:
+# без этого двойной тап даёт два сообщения, два таймера сессии и гонку за entries в данных FSM
+class KeyedEventIsolation(BaseEventIsolation):
+    def __init__(self):
+        self.locks = KeyedLocks()
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncIterator[None]:
+        async with self.locks.hold(key):
+            token = _held_lock.set(object())
+            try:
+                yield
+            finally:
+                _held_lock.reset(token)
+
+    async def close(self) -> None:
+        pass
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+# FSM в PostgreSQL: одна строка на ключ, данные в JSONB, каждое изменение — один запрос
+class PostgresStorage(BaseStorage):
+    def __init__(self, key_builder: KeyBuilder | None = None, ttl_hours: float = FSM_TTL_HOURS):
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True)
+        self.ttl_hours = ttl_hours
+
+    def _key(self, key: StorageKey) -> str:
+        return self.key_builder.build(key)
+
+    # Любая запись делает прочитанные заранее данные неактуальными
+    def _write_key(self, key: StorageKey) -> str:
+        storage_key = self.key_builder.build(key)
+        prefetched = _prefetched_data.get()
+        if prefetched:
+            prefetched.pop(storage_key, None)
+        return storage_key
+
+    @db_timed
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        async with get_connection() as conn:
+            await conn.execute("""
+                INSERT INTO fsm_storage (key, state) VALUES ($1, $2)
+                ON CONFLICT (key) DO UPDATE
+                SET state = EXCLUDED.state,
+                    data = CASE
+                        WHEN fsm_storage.updated_at > now() - make_interval(secs => $3)
+                        THEN fsm_storage.data
+                        ELSE '{}'::jsonb
+                    END,
+                    updated_at = now()
+            """, self._write_key(key), value, self.ttl_hours * 3600)
+
+    # Состояние читаем вместе с данными: aiogram вызывает get_state на каждый апдейт,
+    # и следующий get_data в том же апдейте обходится без второго запроса
+    @db_timed
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        storage_key = self._key(key)
+        async with get_connection() as conn:
+            row = await conn.fetchrow("""
+                SELECT state, data::text AS data FROM fsm_storage
+                WHERE key = $1 AND updated_at > now() - make_interval(secs => $2)
+            """, storage_key, self.ttl_hours * 3600)
+        _prefetched_data.set({storage_key: (_held_lock.get(), row["data"] if row else None)})
+        return row["state"] if row else None
+
+    @db_timed
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        async with get_connection() as conn:
+            await conn.execute("""
+                INSERT INTO fsm_storage (key, data) VALUES ($1, $2::jsonb)
+                ON CONFLICT (key) DO UPDATE
+                SET data = EXCLUDED.data,
+                    state = CASE
+                        WHEN fsm_storage.updated_at > now() - make_interval(secs => $3)
+                        THEN fsm_storage.state
+                    END,
+                    updated_at = now()
+            """, self._write_key(key), _dumps(data), self.ttl_hours * 3600)
+
+    @db_timed
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        storage_key = self._key(key)
+        prefetched = _prefetched_data.get()
+        entry = prefetched.pop(storage_key, None) if prefetched else None
+        # Данным из get_state верим, только если оба чтения были под одним захватом замка пользователя:
+        # иначе между ними мог записать другой апдейт
+        if entry is not None and entry[0] is not None and entry[0] is _held_lock.get():
+            return json.loads(entry[1]) if entry[1] else {}
+        async with get_connection() as conn:
+            raw = await conn.fetchval("""
+                SELECT data::text FROM fsm_storage
+                WHERE key = $1 AND updated_at > now() - make_interval(secs => $2)
+            """, storage_key, self.ttl_hours * 3600)
+        return json.loads(raw) if raw else {}
+
+    # Слияние на стороне БД: один запрос вместо get_data + set_data
+    @db_timed
+    async def update_data(self, key: StorageKey, data: Dict[str, Any]) -> Dict[str, Any]:
+        async with get_connection() as conn:
+            raw = await conn.fetchval("""
+                INSERT INTO fsm_storage (key, data) VALUES ($1, $2::jsonb)
+                ON CONFLICT (key) DO UPDATE
+                SET data = CASE
+                        WHEN fsm_storage.updated_at > now() - make_interval(secs => $3)
+                        THEN fsm_storage.data || EXCLUDED.data
+                        ELSE EXCLUDED.data
+                    END,
+                    state = CASE
+                        WHEN fsm_storage.updated_at > now() - make_interval(secs => $3)
+                        THEN fsm_storage.state
+                    END,
+                    updated_at = now()
+                RETURNING data::text
+            """, self._write_key(key), _dumps(data), self.ttl_hours * 3600)
+        return json.loads(raw)
+
+    # Состояние и данные одним запросом (см. fsm_session.BaristaSession.flush)
+    @db_timed
+    async def set_state_and_data(self, key: StorageKey, state: StateType, data: Dict[str, Any]) -> None:
+        value = state.state if isinstance(state, State) else state
+        async with get_connection() as conn:
+            await conn.execute("""
+                INSERT INTO fsm_storage (key, state, data) VALUES ($1, $2, $3::jsonb)
+                ON CONFLICT (key) DO UPDATE
+                SET state = EXCLUDED.state, data = EXCLUDED.data, updated_at = now()
+            """, self._write_key(key), value, _dumps(data))
+
+    async def close(self) -> None:
+        # Пул соединений закрывается в bot_barista.main()
+        pass
+
+
+# Удаляем брошенные сессии (вызывается планировщиком)
+async def delete_expired_fsm_sessions(ttl_hours: float = FSM_TTL_HOURS):
+    async with get_connection() as conn:
+        result = await conn.execute("""
+            DELETE FROM fsm_storage
+            WHERE updated_at < now() - make_interval(secs => $1)
+        """, ttl_hours * 3600)
+    logging.info(f"[FSM] Очистка просроченных сессий: {result}")
+
+
+# Создаём хранилище по настройке FSM_STORAGE
+def create_storage(kind: str = FSM_STORAGE) -> BaseStorage:
+    if kind == "postgres":
+        return PostgresStorage()
+    if kind == "memory":
+        return MemoryStorage()
+    raise ValueError(f"Неизвестный FSM_STORAGE: {kind}")
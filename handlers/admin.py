@@ -0,0 +1,156 @@
+# handlers/admin.py
+# Служебные команды для администраторов (ADMIN_IDS в .env через запятую)
+
+import html
+import logging
+import os
+from datetime import date
+
+from aiogram import Router, F
+from aiogram.filters import Command, CommandObject
+from aiogram.types import FSInputFile, Message
+
+from cache import CACHES
+from catalogue import catalogue
+from database import DAILY_SESSION_TARGET, get_daily_compliance, get_pool_stats
+from metrics import DB_LATENCY, HANDLER_LATENCY, TELEGRAM_LATENCY, UPDATE_LATENCY, format_summary
+from reports import report_service
+
+ADMIN_IDS = {int(x) for x in os.getenv("ADMIN_IDS", "").replace(" ", "").split(",") if x}
+
+router = Router()
+router.message.filter(F.from_user.id.in_(ADMIN_IDS))
+
+
+# /stats — задержки по обработчикам, БД и Telegram API
+@router.message(Command("stats"))
+async def cmd_stats(message: Message):
+    sections = [
+        ("Апдейты", UPDATE_LATENCY),
+        ("Обработчики", HANDLER_LATENCY),
+        ("База данных", DB_LATENCY),
+        ("Telegram API", TELEGRAM_LATENCY),
+    ]
+    pool = get_pool_stats()
+    lines = [
+        f"<b>Пул БД:</b> занято {pool['in_use']} из {pool['size']} "
+        f"(min={pool['min_size']}, max={pool['max_size']})"
+    ]
+    for cache in CACHES:
+        stats = cache.stats()
+        lines.append(
+            f"<b>Кэш {cache.name}:</b> попаданий {stats['hit_rate']:.0%} "
+            f"({stats['hits']}/{stats['hits'] + stats['misses']}), размер {stats['size']}"
+        )
+    for title, histogram in sections:
+        summary = format_summary(histogram, limit=5)
+        lines.append(f"\n<b>{title}</b>")
+        lines.extend(html.escape(row) for row in summary or ["нет данных"])
+    await message.answer("\n".join(lines))
+
+
+# /compliance [ГГГГ-ММ-ДД] — какие кофейни сделали норму проверок и где были отклонения
+@router.message(Command("compliance"))
+async def cmd_compliance(message: Message, command: CommandObject):
+    try:
+        day = date.fromisoformat(command.args.strip()) if command.args else date.today()
+    except ValueError:
+        await message.answer("❗ Дата в формате ГГГГ-ММ-ДД, например 2025-04-05")
+        return
+
+    sessions, devices = await get_daily_compliance(day)
+    lines = [f"<b>Проверки за {day:%d.%m.%Y}</b> (норма — {DAILY_SESSION_TARGET})"]
+    for shop in catalogue.shops:
+        code = shop.code
+        count = sessions.get(code, 0)
+        mark = "✅" if count >= DAILY_SESSION_TARGET else "❌"
+        lines.append(f"{mark} {html.escape(code)} — {count}")
+
+    if devices:
+        lines.append("\n<b>Выход за допустимые пределы</b>")
+        for row in devices:
+            lines.append(
+                f"⚠️ {html.escape(row['coffeeshop_id'])}: {row['device_type']} {row['device_number']} — "
+                f"{row['out_of_range_count']} из {row['session_count']}, "
+                f"мин {row['min_temp']:.1f}, макс {row['max_temp']:.1f}, ср {row['avg_temp']:.1f}"
+            )
+    await message.answer("\n".join(lines))
+
+
+# /report код кофейни [ГГГГ-ММ-ДД] — график температур за день (по умолчанию сегодня)
+@router.message(Command("report"))
+async def cmd_report(message: Message, command: CommandObject):
+    args = (command.args or "").split()
+    day = date.today()
+    if len(args) > 1:
+        try:
+            day = date.fromisoformat(args[-1])
+            args = args[:-1]
+        except ValueError:
+            pass
+    query = " ".join(args)
+    if not query:
+        await message.answer("❗ Формат: /report 0-16.5 [2025-04-05]")
+        return
+    # В журнале кофейня записана полным кодом ("0-16.5 (Т-Банк | 5 этаж)") — по нему же ключ кэша
+    shop = catalogue.resolve(query)
+    if shop is None:
+        options = catalogue.search(query, limit=5)
+        if options:
+            await message.answer("❗ Уточни кофейню:\n" + "\n".join(html.escape(s.code) for s in options))
+        else:
+            await message.answer(f"❗ Кофейня «{html.escape(query)}» не найдена")
+        return
+
+    # Повторный запрос за тот же день отдаётся из кэша, без БД и перерисовки
+    try:
+        artifact = await report_service.get(shop.code, day)
+    except RuntimeError as e:
+        await message.answer(f"⚠️ {html.escape(str(e))}")
+        return
+    if artifact is None:
+        await message.answer(f"За {day:%d.%m.%Y} в {html.escape(shop.code)} записей нет")
+        return
+    await report_service.send(message.bot, message.chat.id, shop.code, day, artifact)
+
+
+# /export ГГГГ-ММ-ДД ГГГГ-ММ-ДД [код кофейни|all] [csv|xlsx] — журнал за период файлом
+@router.message(Command("export"))
+async def cmd_export(message: Message, command: CommandObject):
+    args = (command.args or "").split()
+    try:
+        date_from, date_to = date.fromisoformat(args[0]), date.fromisoformat(args[1])
+    except (IndexError, ValueError):
+        await message.answer(
+            "❗ Формат: /export 2025-01-01 2025-12-31 [0-16.5|all] [csv|xlsx]"
+        )
+        return
+
+    fmt = "xlsx" if "xlsx" in args[2:] else "csv"
+    rest = [a for a in args[2:] if a not in ("csv", "xlsx", "all")]
+    shop_code = rest[0] if rest else None
+
+    await message.answer("⏳ Готовлю выгрузку…")
+    try:
+        # Выгрузка нужна редко — модуль грузится при первой команде
+        from export import export_journal
+        path, count = await export_journal(date_from, date_to, shop_code, fmt)
+    except RuntimeError as e:
+        await message.answer(f"⚠️ {html.escape(str(e))}")
+        return
+    except Exception:
+        logging.exception(f"[EXPORT] Выгрузка {date_from}..{date_to} ({shop_code or 'all'}, {fmt}) не удалась")
+        await message.answer("⚠️ Не удалось подготовить выгрузку, попробуйте позже")
+        return
+
+    try:
+        filename = f"journal_{shop_code or 'all'}_{date_from}_{date_to}.{fmt}"
+        await message.answer_document(
+            FSInputFile(path, filename=filename),
+            caption=f"Записей: {count}",
+        )
+    except Exception:
+        logging.exception(f"[EXPORT] Файл {filename} не отправлен")
+        await message.answer("⚠️ Выгрузка готова, но отправить файл не удалось, попробуйте позже")
+    finally:
+        os.remove(path)
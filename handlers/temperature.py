@@ -1,36 +1,24 @@
 # handlers/temperature.py
 # FSM-логика после выбора кофейни: устройства → температуры → имя → завершение
 
-import re
+import logging
+
 from aiogram import Router, F
-from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.filters import StateFilter
+from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
+from fsm_session import BaristaSession
 from session_states import SessionState
 from datetime import datetime
 from database import save_temperature_entries
+from journal_queue import journal_queue
 from scheduler import mark_session_complete
+from utils.parsing import TemperatureParseError, is_bulk_entry, normalize_temperature, parse_bulk_entries
+from utils.keyboards import CHANGE_COFFEE_KB, NEW_ENTRY_KB, coffee_keyboard, device_type_kb, yes_no_kb
 
 router = Router()
 
 
-# Кнопки выбора типа устройства
-def device_type_kb():
-    return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🧊 Холодильник", callback_data="type:fridge")],
-        [InlineKeyboardButton(text="❄️ Морозилка", callback_data="type:freezer")]
-    ])
-
-
-# Кнопки Да / Нет
-def yes_no_kb():
-    return InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="✅ Да", callback_data="add_more"),
-            InlineKeyboardButton(text="❌ Нет", callback_data="finish_devices")
-        ]
-    ])
-
-
 # Команда /start повторно
 @router.message(F.text == "/start")
 async def cmd_start_with_reminder(message: Message, state: FSMContext):
@@ -40,77 +28,88 @@ async def cmd_start_with_reminder(message: Message, state: FSMContext):
     if selected:
         await message.answer(
             f"📍 Ты заполняешь журнал для: {selected}",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🔁 Изменить кофейню", callback_data="restart")]
-            ])
+            reply_markup=CHANGE_COFFEE_KB
         )
         await message.answer("Выберите тип устройства:", reply_markup=device_type_kb())
         await state.set_state(SessionState.choosing_device_type)
     else:
-        from handlers.start import generate_coffee_keyboard
-        await message.answer("Привет! Выбери свою кофейню:", reply_markup=generate_coffee_keyboard(0))
+        await message.answer("Привет! Выбери свою кофейню:", reply_markup=coffee_keyboard(0))
         await state.set_state(SessionState.start)
 
 
 # Выбор типа устройства → переход к вводу температуры
 @router.callback_query(F.data.startswith("type:"))
-async def choose_device_type(callback: CallbackQuery, state: FSMContext):
-    device_type = callback.data.split(":")[1]
-    await state.update_data(current_type=device_type)
-    await callback.message.answer("Введи температуру устройства (используй только цифры и точки):")
-    await state.set_state(SessionState.entering_temperature)
+async def choose_device_type(callback: CallbackQuery, session: BaristaSession):
+    session.current_type = callback.data.split(":")[1]
+    await callback.message.answer(
+        "Введи температуру устройства (используй только цифры и точки).\n"
+        "Можно сразу всё одним сообщением: Х 3.5 4.1 / М -18"
+    )
+    session.set_state(SessionState.entering_temperature)
     await callback.answer()
 
 
+# Вся сессия одним сообщением: "Х 3.5 4.1 2.9 / М -18 -19.5" → сразу к вводу имени
+@router.message(
+    StateFilter(
+        SessionState.choosing_device_type,
+        SessionState.entering_temperature,
+        SessionState.confirming_continue,
+    ),
+    F.text.func(is_bulk_entry),
+)
+async def get_bulk_temperatures(message: Message, session: BaristaSession):
+    try:
+        parsed = parse_bulk_entries(message.text)
+    except TemperatureParseError as e:
+        await message.answer(f"❗ {e}\nПример: Х 3.5 4.1 2.9 / М -18 -19.5")
+        return
+
+    if session.total_devices + len(parsed) < 3:
+        await message.answer("❗ Нужно минимум 3 устройства. Добавь ещё значения одним сообщением.")
+        return
+
+    for device_type, temp in parsed:
+        session.add_entry(device_type, temp)
+    session.current_type = None
+
+    lines = [
+        f"{'🧊 Холодильник' if e['type'] == 'fridge' else '❄️ Морозилка'} {e['number']}: {e['temp']:g}"
+        for e in session.entries
+    ]
+    await message.answer(
+        "Записано:\n" + "\n".join(lines) +
+        "\n\nЕсли всё верно — введи свои имя и фамилию (через пробел). Если есть ошибка — начни заново: /start"
+    )
+    session.set_state(SessionState.entering_name)
+
+
 # Ввод температуры
 @router.message(SessionState.entering_temperature)
-async def get_temperature(message: Message, state: FSMContext):
-    text = re.sub(r"(?<=[\-+])\s+", "", message.text.replace(",", ".").strip())
+async def get_temperature(message: Message, session: BaristaSession):
+    text = normalize_temperature(message.text)
     try:
         temp = float(text)
     except ValueError:
         await message.answer("❗ Пожалуйста, введи температуру числом. Например: 4.3 или -18")
         return
 
-    data = await state.get_data()
-    device_type = data.get("current_type")
+    device_type = session.current_type
 
     if not device_type:
         await message.answer("⚠️ Сначала выбери тип устройства.")
-        await state.set_state(SessionState.choosing_device_type)
+        session.set_state(SessionState.choosing_device_type)
         return
 
-    entries = data.get("entries", [])
-    fridge_count = data.get("fridge_count", 0)
-    freezer_count = data.get("freezer_count", 0)
+    session.add_entry(device_type, temp)
+    session.current_type = None
 
-    if device_type == "fridge":
-        fridge_count += 1
-        number = fridge_count
-    else:
-        freezer_count += 1
-        number = freezer_count
-
-    entries.append({
-        "type": device_type,
-        "number": number,
-        "temp": temp
-    })
-
-    await state.update_data(
-        entries=entries,
-        fridge_count=fridge_count,
-        freezer_count=freezer_count,
-        current_type=None
-    )
-
-    total = fridge_count + freezer_count
-    if total < 3:
+    if session.total_devices < 3:
         await message.answer("Добавим ещё устройство 🥶", reply_markup=device_type_kb())
-        await state.set_state(SessionState.choosing_device_type)
+        session.set_state(SessionState.choosing_device_type)
     else:
         await message.answer("Хочешь добавить ещё устройство?", reply_markup=yes_no_kb())
-        await state.set_state(SessionState.confirming_continue)
+        session.set_state(SessionState.confirming_continue)
 
 
 # Кнопка "Да, добавить ещё"
@@ -131,48 +130,47 @@ async def proceed_to_name(callback: CallbackQuery, state: FSMContext):
 
 # Ввод имени бариста
 @router.message(SessionState.entering_name)
-async def handle_name(message: Message, state: FSMContext):
+async def handle_name(message: Message, session: BaristaSession):
     parts = message.text.strip().split()
     if len(parts) != 2:
         await message.answer("❗ Пожалуйста, введи имя и фамилию через пробел.")
         return
 
-    name = f"{parts[0]} {parts[1]}"
-    await state.update_data(barista_name=name)
-
-    data = await state.get_data()
-    coffee_code = data.get("coffee_code")
+    session.barista_name = f"{parts[0]} {parts[1]}"
+    coffee_code = session.coffee_code
 
     if not coffee_code:
         await message.answer("⚠️ Ошибка: не удалось получить код кофейни. Попробуй начать заново с /start")
-        await state.clear()
+        session.clear()
         return
 
     coffee_code = coffee_code.replace("Москва ", "")
-    entries = data.get("entries", [])
-    barista_name = data.get("barista_name")
     user_id = message.from_user.id
 
     now = datetime.now()
     session_date = now.date()
     session_time = now.time().replace(microsecond=0)
 
-    await save_temperature_entries(
+    record = dict(
         user_id=user_id,
-        barista_name=barista_name,
+        barista_name=session.barista_name,
         coffee_code=coffee_code,
-        entries=entries,
+        entries=session.entries,
         session_date=session_date,
         session_time=session_time
     )
+    # Сначала на локальный диск — Postgres получит сессию из фоновой очереди
+    try:
+        await journal_queue.enqueue(**record)
+    except Exception:
+        logging.exception("[QUEUE] Не удалось поставить сессию в очередь, пишем напрямую")
+        await save_temperature_entries(**record)
 
-    mark_session_complete(user_id)
+    await mark_session_complete(user_id)
 
     await message.answer("✅ Спасибо! Данные записаны.\nХорошей смены ☕️",
-                         reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                             [InlineKeyboardButton(text="🔄 Начать новую запись", callback_data="new_entry")]
-                         ]))
-    await state.clear()
+                         reply_markup=NEW_ENTRY_KB)
+    session.clear()
 
 
 # Обработчик кнопки "Продолжить" после напоминания
@@ -0,0 +1,193 @@
+# journal_queue.py
+# Локальная очередь записи журнала (SQLite на /data): сессия сначала надёжно ложится на диск,
+# бариста сразу получает подтверждение, а фоновая задача переносит сессии в Postgres
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from datetime import date, time as dtime
+
+from database import save_temperature_entries, save_temperature_sessions
+
+# /data — persistenceMount из amvera.yml, переживает перезапуски контейнера;
+# локально — каталог data/ рядом с кодом (в .gitignore), а не текущий каталог процесса
+JOURNAL_QUEUE_DIR = "/data" if os.path.isdir("/data") else os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+JOURNAL_QUEUE_PATH = os.getenv("JOURNAL_QUEUE_PATH", os.path.join(JOURNAL_QUEUE_DIR, "journal_queue.sqlite3"))
+JOURNAL_QUEUE_BATCH = int(os.getenv("JOURNAL_QUEUE_BATCH", "50"))
+JOURNAL_QUEUE_MAX_BACKOFF = float(os.getenv("JOURNAL_QUEUE_MAX_BACKOFF", "300"))
+JOURNAL_QUEUE_POLL = float(os.getenv("JOURNAL_QUEUE_POLL", "5"))
+
+
+class JournalQueue:
+    def __init__(self, path: str = JOURNAL_QUEUE_PATH):
+        self.path = path
+        self.db: sqlite3.Connection | None = None
+        self.lock = asyncio.Lock()
+        self.wakeup = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+    def _open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=FULL")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS journal_queue (
+                id              INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                payload         TEXT NOT NULL,
+                attempts        INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error      TEXT
+            )
+        """)
+        return db
+
+    async def _run_db(self, func, *args):
+        async with self.lock:
+            return await asyncio.to_thread(func, *args)
+
+    async def open(self):
+        if self.db is None:
+            self.db = await asyncio.to_thread(self._open)
+            pending = await self.pending()
+            logging.info(f"[QUEUE] Очередь журнала: {self.path}, ожидают отправки: {pending}")
+
+    # Кладём сессию в очередь; после возврата она уже на диске
+    async def enqueue(
+        self,
+        user_id: int,
+        barista_name: str,
+        coffee_code: str,
+        entries: list[dict],
+        session_date: date,
+        session_time: dtime,
+    ) -> str:
+        key = str(uuid.uuid4())
+        payload = json.dumps({
+            "user_id": user_id,
+            "barista_name": barista_name,
+            "coffee_code": coffee_code,
+            "entries": entries,
+            "session_date": session_date.isoformat(),
+            "session_time": session_time.isoformat(),
+        }, ensure_ascii=False)
+        await self._run_db(
+            self.db.execute,
+            "INSERT INTO journal_queue (idempotency_key, payload, next_attempt_at) VALUES (?, ?, ?)",
+            (key, payload, time.time()),
+        )
+        self.wakeup.set()
+        return key
+
+    async def pending(self) -> int:
+        cursor = await self._run_db(self.db.execute, "SELECT COUNT(*) FROM journal_queue")
+        return cursor.fetchone()[0]
+
+    async def _due_batch(self) -> list[tuple]:
+        cursor = await self._run_db(
+            self.db.execute,
+            """
+            SELECT id, idempotency_key, payload, attempts FROM journal_queue
+            WHERE next_attempt_at <= ? ORDER BY id LIMIT ?
+            """,
+            (time.time(), JOURNAL_QUEUE_BATCH),
+        )
+        return cursor.fetchall()
+
+    async def _next_due_in(self) -> float:
+        cursor = await self._run_db(self.db.execute, "SELECT MIN(next_attempt_at) FROM journal_queue")
+        next_at = cursor.fetchone()[0]
+        if next_at is None:
+            return JOURNAL_QUEUE_POLL
+        return max(0.0, min(next_at - time.time(), JOURNAL_QUEUE_POLL))
+
+    @staticmethod
+    def _session(key: str, payload: str) -> dict:
+        data = json.loads(payload)
+        return {
+            "user_id": data["user_id"],
+            "barista_name": data["barista_name"],
+            "coffee_code": data["coffee_code"],
+            "entries": data["entries"],
+            "session_date": date.fromisoformat(data["session_date"]),
+            "session_time": dtime.fromisoformat(data["session_time"]),
+            "idempotency_key": key,
+        }
+
+    # Отправляем пачку в Postgres одной транзакцией; если она не прошла — по одной сессии,
+    # чтобы отложить только ту, на которой ошибка
+    async def flush(self) -> int:
+        batch = await self._due_batch()
+        if len(batch) > 1:
+            try:
+                await save_temperature_sessions([self._session(key, payload) for _, key, payload, _ in batch])
+            except Exception as e:
+                logging.warning(f"[QUEUE] Пачка из {len(batch)} сессий не записана: {e}; отправляем по одной")
+            else:
+                await self._run_db(
+                    self.db.executemany,
+                    "DELETE FROM journal_queue WHERE id = ?",
+                    [(row_id,) for row_id, *_ in batch],
+                )
+                return len(batch)
+        return await self._flush_one_by_one(batch)
+
+    # При ошибке — экспоненциальная задержка для этой записи
+    async def _flush_one_by_one(self, batch: list[tuple]) -> int:
+        sent = 0
+        for row_id, key, payload, attempts in batch:
+            try:
+                await save_temperature_entries(**self._session(key, payload))
+            except Exception as e:
+                delay = min(JOURNAL_QUEUE_MAX_BACKOFF, 2 ** attempts)
+                logging.warning(f"[QUEUE] Не удалось записать сессию {key} (попытка {attempts + 1}): {e}")
+                await self._run_db(
+                    self.db.execute,
+                    "UPDATE journal_queue SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    (time.time() + delay, str(e), row_id),
+                )
+                # База, скорее всего, недоступна — остальные попробуем позже
+                break
+            await self._run_db(self.db.execute, "DELETE FROM journal_queue WHERE id = ?", (row_id,))
+            sent += 1
+        return sent
+
+    async def _run(self):
+        while True:
+            try:
+                await self.flush()
+                timeout = await self._next_due_in()
+            except Exception:
+                logging.exception("[QUEUE] Ошибка фоновой отправки журнала")
+                timeout = JOURNAL_QUEUE_POLL
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self):
+        await self.open()
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.db is not None:
+            # Последняя попытка отправить то, что накопилось
+            try:
+                await self.flush()
+            except Exception:
+                logging.exception("[QUEUE] Не удалось отправить очередь при остановке")
+            await self._run_db(self.db.close)
+            self.db = None
+
+
+journal_queue = JournalQueue()
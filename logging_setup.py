@@ -0,0 +1,125 @@
+# logging_setup.py
+# Логирование без блокировки event loop: записи уходят в очередь, а на диск и в консоль
+# их пишет отдельный поток QueueListener. Файл ротируется по размеру и по времени
+
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.getenv("LOG_FILE", "bot.log")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text / json
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_ROTATE_HOURS = float(os.getenv("LOG_ROTATE_HOURS", "24"))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "7"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+
+# Контекст текущего апдейта — заполняется middleware, попадает в каждую запись
+log_update_id: ContextVar[int | None] = ContextVar("log_update_id", default=None)
+log_user_id: ContextVar[int | None] = ContextVar("log_user_id", default=None)
+log_handler: ContextVar[str | None] = ContextVar("log_handler", default=None)
+
+
+class UpdateContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.update_id = log_update_id.get()
+        record.user_id = log_user_id.get()
+        record.handler = log_handler.get()
+        return True
+
+
+# Очередь с ограничением: при переполнении запись отбрасывается, обработка апдейта не ждёт
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    # Сообщение собираем сразу (аргументы могут измениться), трейсбек — отдельным полем
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# Ротация и по размеру, и по времени: что наступит раньше
+class SizeAndTimeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    def __init__(self, filename: str, max_bytes: int, interval_hours: float, backup_count: int):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self.interval = interval_hours * 3600
+        self.rollover_at = time.time() + self.interval
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.interval and time.time() >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval
+
+
+# JSON lines: одна запись — одна строка
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in ("update_id", "user_id", "handler"):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def create_formatter(kind: str = LOG_FORMAT) -> logging.Formatter:
+    if kind == "json":
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT)
+
+
+# Настраивает корневой логгер; вернувшийся listener нужно остановить при выходе
+def setup_logging() -> logging.handlers.QueueListener:
+    formatter = create_formatter()
+    file_handler = SizeAndTimeRotatingFileHandler(LOG_FILE, LOG_MAX_BYTES, LOG_ROTATE_HOURS, LOG_BACKUP_COUNT)
+    stream_handler = logging.StreamHandler(sys.stderr)
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(UpdateContextFilter())
+
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
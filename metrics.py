@@ -0,0 +1,168 @@
+# metrics.py
+# Гистограммы задержек (апдейты, обработчики, БД, Telegram API) в формате Prometheus
+
+import bisect
+import functools
+import math
+import os
+import time
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+from cache import CACHES
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 — отдельный сервер метрик не поднимаем
+METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
+
+# Границы корзин в секундах
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, labels: tuple[str, ...], buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label values -> [counts по корзинам (+Inf последней), sum, count]
+        self.series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values: str):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    # Оценка квантиля по корзинам (как histogram_quantile в Prometheus)
+    def quantile(self, q: float, *label_values: str) -> float:
+        series = self.series.get(label_values)
+        if not series or not series[2]:
+            return math.nan
+        rank = q * series[2]
+        seen = 0
+        lower = 0.0
+        for i, count in enumerate(series[0]):
+            upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    return upper
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return self.buckets[-1]
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in sorted(self.series.items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == math.inf else repr(bound)
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {total}")
+            lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+UPDATE_LATENCY = Histogram(
+    "bot_update_duration_seconds", "Время обработки апдейта целиком", ("event", "prefix"),
+)
+HANDLER_LATENCY = Histogram(
+    "bot_handler_duration_seconds", "Время работы обработчика", ("router", "handler", "prefix"),
+)
+DB_LATENCY = Histogram(
+    "bot_db_call_duration_seconds", "Время вызова функции database.py", ("call",),
+)
+TELEGRAM_LATENCY = Histogram(
+    "bot_telegram_api_duration_seconds", "Время запроса к Telegram Bot API", ("method",),
+)
+
+HISTOGRAMS = [UPDATE_LATENCY, HANDLER_LATENCY, DB_LATENCY, TELEGRAM_LATENCY]
+
+
+# Префикс callback_data для метки: "select_index:3" -> "select_index:", "add_more" -> "add_more"
+def callback_prefix(data: str | None) -> str:
+    if not data:
+        return ""
+    head, sep, _ = data.partition(":")
+    return head + sep
+
+
+# Декоратор для функций database.py
+def db_timed(func: Callable):
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            DB_LATENCY.observe(time.perf_counter() - started, name)
+
+    return wrapper
+
+
+def render_cache_counters() -> list[str]:
+    lines = []
+    for metric in ("hits", "misses", "evictions"):
+        lines.append(f"# TYPE bot_cache_{metric}_total counter")
+        lines.extend(f'bot_cache_{metric}_total{{cache="{c.name}"}} {getattr(c, metric)}' for c in CACHES)
+    lines.append("# TYPE bot_cache_size gauge")
+    lines.extend(f'bot_cache_size{{cache="{c.name}"}} {len(c)}' for c in CACHES)
+    return lines
+
+
+def render_metrics() -> str:
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    lines.extend(render_cache_counters())
+    return "\n".join(lines) + "\n"
+
+
+# aiohttp.web подгружается только когда метрики реально отдаются по HTTP
+async def metrics_view(request: "web.Request") -> "web.Response":
+    from aiohttp import web
+    return web.Response(text=render_metrics(), content_type="text/plain", charset="utf-8")
+
+
+def register_metrics_route(app: "web.Application"):
+    app.router.add_get(METRICS_PATH, metrics_view)
+
+
+# Отдельный сервер метрик (для режима polling)
+async def start_metrics_server(port: int = METRICS_PORT) -> "web.AppRunner | None":
+    if not port:
+        return None
+    from aiohttp import web
+    app = web.Application()
+    register_metrics_route(app)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host="0.0.0.0", port=port).start()
+    return runner
+
+
+# Короткая сводка для /stats: самые медленные серии по p95
+def format_summary(histogram: Histogram, limit: int = 10) -> list[str]:
+    rows = []
+    for label_values, (_, total, count) in histogram.series.items():
+        if count:
+            rows.append((histogram.quantile(0.95, *label_values), total / count, count, label_values))
+    rows.sort(reverse=True)
+    return [
+        f"{' '.join(v for v in labels if v) or '—'}: n={count}, "
+        f"avg={avg * 1000:.0f} ms, p95={p95 * 1000:.0f} ms"
+        for p95, avg, count, labels in rows[:limit]
+    ]
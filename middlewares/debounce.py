@@ -0,0 +1,65 @@
+# middlewares/debounce.py
+# Повторные нажатия той же кнопки в пределах CALLBACK_DEBOUNCE_SECONDS отбрасываются ещё до замка
+# пользователя (fsm_storage.KeyedEventIsolation): второй тап не ждёт первый и не запускает обработчик
+
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject, Update
+
+CALLBACK_DEBOUNCE_SECONDS = float(os.getenv("CALLBACK_DEBOUNCE_SECONDS", "1.0"))
+
+
+class CallbackDebounceMiddleware(BaseMiddleware):
+    def __init__(self, debounce_seconds: float = CALLBACK_DEBOUNCE_SECONDS):
+        self.debounce_seconds = debounce_seconds
+        # (chat, user, сообщение, callback_data) -> когда нажали последний раз
+        self.recent_callbacks: dict[tuple, float] = {}
+        self.dropped = 0
+
+    def is_repeat(self, key: tuple) -> bool:
+        now = time.monotonic()
+        if len(self.recent_callbacks) > 1000:
+            self.recent_callbacks = {
+                k: pressed for k, pressed in self.recent_callbacks.items()
+                if now - pressed < self.debounce_seconds
+            }
+        last = self.recent_callbacks.get(key)
+        self.recent_callbacks[key] = now
+        return last is not None and now - last < self.debounce_seconds
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        callback = event.callback_query
+        if callback is None or self.debounce_seconds <= 0:
+            return await handler(event, data)
+
+        chat = data.get("event_chat")
+        message_id = callback.message.message_id if callback.message else callback.inline_message_id
+        if self.is_repeat((chat.id if chat else None, callback.from_user.id, message_id, callback.data)):
+            self.dropped += 1
+            logging.debug(f"[DEBOUNCE] Повторное нажатие {callback.data!r} отброшено")
+            # Снимаем «часики» с кнопки; обработчик второй раз не запускаем
+            try:
+                await callback.answer()
+            except Exception as e:
+                logging.debug(f"[DEBOUNCE] answer_callback_query: {e}")
+            return None
+        return await handler(event, data)
+
+
+# FSMContextMiddleware (замок пользователя и чтение состояния) переносим в конец внешних middleware:
+# повторный тап отбрасывается до замка, а ожидание замка входит в задержку апдейта в метриках и логах
+def setup_debounce(dp: Dispatcher) -> CallbackDebounceMiddleware:
+    middleware = CallbackDebounceMiddleware()
+    dp.update.outer_middleware(middleware)
+    dp.update.outer_middleware.unregister(dp.fsm)
+    dp.update.outer_middleware(dp.fsm)
+    return middleware
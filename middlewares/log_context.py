@@ -0,0 +1,50 @@
+# middlewares/log_context.py
+# Контекст для логов: update_id, user_id и имя обработчика попадают в каждую запись апдейта
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Dispatcher, Router
+from aiogram.types import TelegramObject, Update
+
+from logging_setup import log_handler, log_update_id, log_user_id
+
+
+# Внешний middleware на dp.update: апдейт и пользователь
+class UpdateLogContextMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        update_token = log_update_id.set(event.update_id)
+        user_token = log_user_id.set(user.id if user else None)
+        try:
+            return await handler(event, data)
+        finally:
+            log_user_id.reset(user_token)
+            log_update_id.reset(update_token)
+
+
+# Внутренний middleware роутера: какой обработчик выбран
+class HandlerLogContextMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        token = log_handler.set(handler_object.callback.__name__ if handler_object else None)
+        try:
+            return await handler(event, data)
+        finally:
+            log_handler.reset(token)
+
+
+def setup_log_context(dp: Dispatcher, *routers: Router):
+    dp.update.outer_middleware(UpdateLogContextMiddleware())
+    for router in routers:
+        router.message.middleware(HandlerLogContextMiddleware())
+        router.callback_query.middleware(HandlerLogContextMiddleware())
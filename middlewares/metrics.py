@@ -0,0 +1,95 @@
+# middlewares/metrics.py
+# Замер задержек: апдейт целиком, обработчик, запросы к Telegram API
+
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot, Dispatcher, Router
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import CallbackQuery, Message, TelegramObject, Update
+
+from metrics import HANDLER_LATENCY, TELEGRAM_LATENCY, UPDATE_LATENCY, callback_prefix
+
+
+# Команды, для которых в метриках своя метка; остальной текст после «/» пишет кто угодно —
+# он идёт в одну метку "other", иначе число серий растёт без ограничений
+KNOWN_COMMANDS = frozenset({"/start", "/shop", "/stats", "/compliance", "/report", "/export"})
+
+
+def event_prefix(event: TelegramObject | None) -> str:
+    if isinstance(event, CallbackQuery):
+        return callback_prefix(event.data)
+    if isinstance(event, Message) and event.text and event.text.startswith("/"):
+        # "/stats@barista_bot 7" -> "/stats"
+        command = event.text.split()[0].split("@", 1)[0]
+        return command if command in KNOWN_COMMANDS else "other"
+    return ""
+
+
+# Внешний middleware на dp.update: полное время апдейта
+class UpdateMetricsMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            UPDATE_LATENCY.observe(
+                time.perf_counter() - started,
+                event.event_type,
+                event_prefix(event.event),
+            )
+
+
+# Внутренний middleware роутера: время конкретного обработчика
+class HandlerMetricsMiddleware(BaseMiddleware):
+    def __init__(self, router_name: str):
+        self.router_name = router_name
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = handler_object.callback.__name__ if handler_object else "unknown"
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            HANDLER_LATENCY.observe(
+                time.perf_counter() - started,
+                self.router_name,
+                name,
+                event_prefix(event),
+            )
+
+
+# Middleware сессии бота: время каждого запроса к Bot API
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            TELEGRAM_LATENCY.observe(time.perf_counter() - started, method.__api_method__)
+
+
+def setup_metrics(dp: Dispatcher, bot: Bot, routers: dict[str, Router]):
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    for name, router in routers.items():
+        router.message.middleware(HandlerMetricsMiddleware(name))
+        router.callback_query.middleware(HandlerMetricsMiddleware(name))
+    bot.session.middleware(TelegramMetricsMiddleware())
@@ -0,0 +1,37 @@
+# middlewares/session.py
+# Подставляет в обработчик параметр session: BaristaSession и сохраняет его после обработки
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Router
+from aiogram.fsm.context import FSMContext
+from aiogram.types import TelegramObject
+
+from fsm_session import BaristaSession
+
+
+class SessionMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        state: FSMContext | None = data.get("state")
+        # Грузим данные только для обработчиков, которые просят session
+        if state is None or handler_object is None or "session" not in handler_object.params:
+            return await handler(event, data)
+
+        session = await BaristaSession.load(state.storage, state.key, data.get("raw_state"))
+        data["session"] = session
+        result = await handler(event, data)
+        # Если обработчик упал — ничего не пишем, сессия остаётся как была до апдейта
+        await session.flush(state.storage, state.key)
+        return result
+
+
+def setup_session(*routers: Router):
+    for router in routers:
+        router.message.middleware(SessionMiddleware())
+        router.callback_query.middleware(SessionMiddleware())
@@ -0,0 +1,191 @@
+# migrate.py
+# Миграции схемы: файлы migrations/NNN_*.sql применяются по порядку, каждый один раз и в своей транзакции.
+# Учёт — в таблице schema_migrations, блокировка — на прямом подключении (DATABASE_DIRECT_URL, в обход pgbouncer).
+# Запускаются при старте бота (DB_MIGRATE_ON_START=1) или из консоли:
+#
+#   python migrate.py                  — применить новые миграции
+#   python migrate.py status           — какие применены, какие ждут
+#   python migrate.py mark 008         — отметить миграции до 008 включительно как применённые
+#                                        (база, где их уже накатывали вручную)
+#   python migrate.py partitions       — партиции temp_journal наперёд и retention старых месяцев
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sys
+from dataclasses import dataclass
+from datetime import date
+
+from database import close_pool, connect, get_connection, init_pool
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+DB_MIGRATE_ON_START = os.getenv("DB_MIGRATE_ON_START", "1") == "1"
+# Несколько реплик стартуют одновременно — миграции применяет одна, остальные ждут
+MIGRATION_LOCK_KEY = int(os.getenv("MIGRATION_LOCK_KEY", "7305012"))
+
+# Партиции temp_journal: сколько месяцев создавать наперёд и сколько хранить (0 — хранить всё)
+JOURNAL_PARTITIONS_AHEAD = int(os.getenv("JOURNAL_PARTITIONS_AHEAD", "3"))
+JOURNAL_RETENTION_MONTHS = int(os.getenv("JOURNAL_RETENTION_MONTHS", "0"))
+# schema — отсоединить и перенести в схему journal_archive; drop — удалить
+JOURNAL_ARCHIVE_MODE = os.getenv("JOURNAL_ARCHIVE_MODE", "schema")
+JOURNAL_ARCHIVE_SCHEMA = "journal_archive"
+
+MIGRATION_RE = re.compile(r"^(\d+)_(\w+)\.sql$")
+PARTITION_RE = re.compile(r"^temp_journal_p(\d{4})(\d{2})$")
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: str
+    name: str
+    sql: str
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode()).hexdigest()
+
+
+def discover(directory: str = MIGRATIONS_DIR) -> list[Migration]:
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_RE.match(filename)
+        if match:
+            with open(os.path.join(directory, filename), encoding="utf-8") as f:
+                migrations.append(Migration(match.group(1), match.group(2), f.read()))
+    return migrations
+
+
+async def _applied(conn) -> dict[str, str]:
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version    TEXT PRIMARY KEY,
+            name       TEXT NOT NULL,
+            checksum   TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    rows = await conn.fetch("SELECT version, checksum FROM schema_migrations")
+    return {row["version"]: row["checksum"] for row in rows}
+
+
+# Применяем все новые миграции; возвращаем версии, которые были применены
+async def migrate() -> list[str]:
+    applied_now = []
+    # Session-level advisory-lock держится только на прямом соединении, не через pgbouncer
+    conn = await connect()
+    try:
+        await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_KEY)
+        try:
+            applied = await _applied(conn)
+            for migration in discover():
+                checksum = applied.get(migration.version)
+                if checksum is not None:
+                    if checksum != migration.checksum:
+                        logging.warning(
+                            f"[MIGRATE] {migration.version}_{migration.name} изменена после применения — "
+                            f"повторно не применяется, изменения оформи новой миграцией"
+                        )
+                    continue
+                logging.info(f"[MIGRATE] Применяем {migration.version}_{migration.name}")
+                async with conn.transaction():
+                    await conn.execute(migration.sql)
+                    await conn.execute(
+                        "INSERT INTO schema_migrations (version, name, checksum) VALUES ($1, $2, $3)",
+                        migration.version, migration.name, migration.checksum,
+                    )
+                applied_now.append(migration.version)
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_KEY)
+    finally:
+        await conn.close()
+    logging.info(f"[MIGRATE] Применено миграций: {len(applied_now)}")
+    return applied_now
+
+
+async def mark_applied(up_to: str):
+    async with get_connection() as conn:
+        await _applied(conn)
+        for migration in discover():
+            if migration.version <= up_to:
+                await conn.execute("""
+                    INSERT INTO schema_migrations (version, name, checksum) VALUES ($1, $2, $3)
+                    ON CONFLICT (version) DO NOTHING
+                """, migration.version, migration.name, migration.checksum)
+
+
+async def status() -> list[tuple[str, str, bool]]:
+    async with get_connection() as conn:
+        applied = await _applied(conn)
+    return [(m.version, m.name, m.version in applied) for m in discover()]
+
+
+def _month_start(day: date, months_back: int = 0) -> date:
+    month_index = day.year * 12 + day.month - 1 - months_back
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+# Партиции на ближайшие месяцы и retention старых: безопасно запускать сколько угодно раз
+async def maintain_journal_partitions(
+    ahead: int = JOURNAL_PARTITIONS_AHEAD,
+    retention_months: int = JOURNAL_RETENTION_MONTHS,
+    archive_mode: str = JOURNAL_ARCHIVE_MODE,
+) -> list[str]:
+    archived = []
+    async with get_connection() as conn:
+        await conn.execute("""
+            SELECT create_temp_journal_partition((date_trunc('month', now()) + make_interval(months => m))::date)
+            FROM generate_series(0, $1) AS m
+        """, ahead)
+        if retention_months <= 0:
+            return archived
+
+        cutoff = _month_start(date.today(), retention_months)
+        partitions = await conn.fetch("""
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'temp_journal'::regclass
+        """)
+        for row in partitions:
+            match = PARTITION_RE.match(row["relname"])
+            if not match or date(int(match.group(1)), int(match.group(2)), 1) >= cutoff:
+                continue
+            partition = row["relname"]
+            async with conn.transaction():
+                await conn.execute(f"ALTER TABLE temp_journal DETACH PARTITION {partition}")
+                if archive_mode == "drop":
+                    await conn.execute(f"DROP TABLE {partition}")
+                else:
+                    await conn.execute(f"CREATE SCHEMA IF NOT EXISTS {JOURNAL_ARCHIVE_SCHEMA}")
+                    await conn.execute(f"ALTER TABLE {partition} SET SCHEMA {JOURNAL_ARCHIVE_SCHEMA}")
+            archived.append(partition)
+    if archived:
+        logging.info(f"[MIGRATE] Старые партиции журнала ({archive_mode}): {', '.join(sorted(archived))}")
+    return archived
+
+
+async def main(args: list[str]):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    command = args[0] if args else "up"
+    await init_pool()
+    try:
+        if command == "up":
+            await migrate()
+            await maintain_journal_partitions(retention_months=0)
+        elif command == "status":
+            for version, name, applied in await status():
+                print(f"{'✅' if applied else '⏳'} {version}_{name}")
+        elif command == "mark" and len(args) == 2:
+            await mark_applied(args[1])
+        elif command == "partitions":
+            await maintain_journal_partitions()
+        else:
+            print("python migrate.py [up|status|mark <версия>|partitions]")
+            sys.exit(2)
+    finally:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
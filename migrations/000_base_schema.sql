@@ -0,0 +1,48 @@
+-- migrations/000_base_schema.sql
+-- Базовые таблицы, на которые опирается код. Раньше их создавали вручную, поэтому всё идемпотентно:
+-- на существующей базе создаётся только недостающее, а пропущенные ключи добавляются
+
+CREATE TABLE IF NOT EXISTS user_profiles (
+    user_id         BIGINT PRIMARY KEY,
+    coffeeshop_code TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS mute_users (
+    user_id  BIGINT PRIMARY KEY,
+    muted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Журнал только дописывается, поэтому разбит по месяцам (партиции — migrations/009)
+CREATE TABLE IF NOT EXISTS temp_journal (
+    id            BIGINT GENERATED BY DEFAULT AS IDENTITY,
+    user_id       BIGINT  NOT NULL,
+    barista       TEXT    NOT NULL,
+    coffeeshop_id TEXT    NOT NULL,
+    date          DATE    NOT NULL,
+    time          TIME    NOT NULL,
+    device_type   TEXT    NOT NULL,
+    device_number INT     NOT NULL,
+    temperature   REAL    NOT NULL,
+    PRIMARY KEY (date, id)
+) PARTITION BY RANGE (date);
+
+-- На старых базах у user_profiles и mute_users не было уникального ключа по user_id,
+-- из-за чего падали ON CONFLICT (user_id). Оставляем последнюю строку и добавляем ключ
+DO $$
+DECLARE
+    tbl TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY['user_profiles', 'mute_users'] LOOP
+        IF NOT EXISTS (
+            SELECT 1
+            FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+            WHERE i.indrelid = tbl::regclass AND i.indisunique AND i.indnatts = 1 AND a.attname = 'user_id'
+        ) THEN
+            EXECUTE format(
+                'DELETE FROM %I a USING %I b WHERE a.user_id = b.user_id AND a.ctid < b.ctid', tbl, tbl
+            );
+            EXECUTE format('CREATE UNIQUE INDEX %I ON %I (user_id)', tbl || '_user_id_key', tbl);
+        END IF;
+    END LOOP;
+END $$;
@@ -0,0 +1,27 @@
+-- migrations/001_reminder_recipients.sql
+-- Получатели напоминаний: одна строка на пользователя вместо DISTINCT по всему temp_journal
+
+CREATE TABLE IF NOT EXISTS reminder_recipients (
+    user_id         BIGINT PRIMARY KEY,
+    coffeeshop_code TEXT,
+    muted           BOOLEAN NOT NULL DEFAULT FALSE,
+    last_seen_at    TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS reminder_recipients_active_idx
+    ON reminder_recipients (user_id) WHERE NOT muted;
+
+-- Бэкфилл: все, у кого есть записи в журнале или сохранённая кофейня
+INSERT INTO reminder_recipients (user_id)
+SELECT DISTINCT user_id FROM temp_journal
+ON CONFLICT (user_id) DO NOTHING;
+
+INSERT INTO reminder_recipients (user_id, coffeeshop_code)
+SELECT user_id, coffeeshop_code FROM user_profiles
+ON CONFLICT (user_id) DO UPDATE
+SET coffeeshop_code = EXCLUDED.coffeeshop_code;
+
+UPDATE reminder_recipients r
+SET muted = TRUE
+FROM mute_users m
+WHERE m.user_id = r.user_id;
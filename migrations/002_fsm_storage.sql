@@ -0,0 +1,11 @@
+-- migrations/002_fsm_storage.sql
+-- Хранилище FSM: состояние и данные незавершённых сессий переживают перезапуск
+
+CREATE TABLE IF NOT EXISTS fsm_storage (
+    key        TEXT PRIMARY KEY,
+    state      TEXT,
+    data       JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS fsm_storage_updated_at_idx ON fsm_storage (updated_at);
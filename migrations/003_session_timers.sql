@@ -0,0 +1,7 @@
+-- migrations/003_session_timers.sql
+-- Ожидающие напоминания о незавершённых сессиях (восстанавливаются при старте)
+
+CREATE TABLE IF NOT EXISTS session_timers (
+    user_id BIGINT PRIMARY KEY,
+    due_at  TIMESTAMPTZ NOT NULL
+);
@@ -0,0 +1,43 @@
+-- migrations/004_daily_compliance.sql
+-- Дневные агрегаты по кофейням: обновляются в той же транзакции, что и запись сессии
+
+CREATE TABLE IF NOT EXISTS shop_daily_sessions (
+    date          DATE NOT NULL,
+    coffeeshop_id TEXT NOT NULL,
+    session_count INT  NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, coffeeshop_id)
+);
+
+CREATE TABLE IF NOT EXISTS device_daily_stats (
+    date               DATE NOT NULL,
+    coffeeshop_id      TEXT NOT NULL,
+    device_type        TEXT NOT NULL,
+    device_number      INT  NOT NULL,
+    session_count      INT  NOT NULL DEFAULT 0,
+    min_temp           REAL NOT NULL,
+    max_temp           REAL NOT NULL,
+    sum_temp           DOUBLE PRECISION NOT NULL DEFAULT 0,
+    out_of_range_count INT  NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, coffeeshop_id, device_type, device_number)
+);
+
+-- Бэкфилл из существующего журнала
+INSERT INTO shop_daily_sessions (date, coffeeshop_id, session_count)
+SELECT date, coffeeshop_id, COUNT(DISTINCT (user_id, time))
+FROM temp_journal
+GROUP BY date, coffeeshop_id
+ON CONFLICT (date, coffeeshop_id) DO NOTHING;
+
+INSERT INTO device_daily_stats (
+    date, coffeeshop_id, device_type, device_number,
+    session_count, min_temp, max_temp, sum_temp, out_of_range_count
+)
+SELECT date, coffeeshop_id, device_type, device_number,
+       COUNT(*), MIN(temperature), MAX(temperature), SUM(temperature),
+       COUNT(*) FILTER (WHERE
+           (device_type = 'Холодильник' AND (temperature < 2 OR temperature > 6))
+           OR (device_type = 'Морозилка' AND temperature > -18)
+       )
+FROM temp_journal
+GROUP BY date, coffeeshop_id, device_type, device_number
+ON CONFLICT (date, coffeeshop_id, device_type, device_number) DO NOTHING;
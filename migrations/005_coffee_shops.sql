@@ -0,0 +1,37 @@
+-- migrations/005_coffee_shops.sql
+-- Справочник кофеен со стабильными id (раньше — список COFFEE_LIST в коде)
+
+CREATE TABLE IF NOT EXISTS coffee_shops (
+    id     SERIAL PRIMARY KEY,
+    name   TEXT NOT NULL UNIQUE,
+    active BOOLEAN NOT NULL DEFAULT TRUE
+);
+
+-- id совпадают с порядком старого списка: старые кнопки select_index:<i> ведут на id i+1
+INSERT INTO coffee_shops (id, name) VALUES
+    (1, 'Москва 0-1 (Омега Плаза)'),
+    (2, 'Москва 0-10 (Магистраль Плаза)'),
+    (3, 'Москва 0-11 (Симонов Плаза)'),
+    (4, 'Москва 0-12 (Арма)'),
+    (5, 'Москва 0-13 (Смарт Парк)'),
+    (6, 'Москва 0-14 (Верейская Плаза)'),
+    (7, 'Москва 0-15 (Сретенка)'),
+    (8, 'Москва 0-15.1 (Учебный Центр)'),
+    (9, 'Москва 0-16.5 (Т-Банк | 5 этаж)'),
+    (10, 'Москва 0-16.7 (Т-Банк | 7 этаж)'),
+    (11, 'Москва 0-16.9 (Т-Банк | 9 этаж)'),
+    (12, 'Москва 0-17 (Хлебозавод)'),
+    (13, 'Москва 0-18 (Альфа-Банк Паскаль)'),
+    (14, 'Москва 0-19 (Солнце Москвы)'),
+    (15, 'Москва 0-2 (Сити-Федерация)'),
+    (16, 'Москва 0-21.4 (Центральный Университет | 4 этаж)'),
+    (17, 'Москва 0-21.8 (Центральный Университет | 8 этаж)'),
+    (18, 'Москва 0-22 (РИО)'),
+    (19, 'Москва 0-23 (ВЭБ Центр)'),
+    (20, 'Москва 0-24 (Поклонка Плейс Остров)'),
+    (21, 'Москва 0-27 (Альфа-Банк Немецкий центр)'),
+    (22, 'Москва 0-3 (Даймонд Холл)'),
+    (23, 'Москва 0-30 (Афимолл Галерея)')
+ON CONFLICT (id) DO NOTHING;
+
+SELECT setval(pg_get_serial_sequence('coffee_shops', 'id'), (SELECT MAX(id) FROM coffee_shops));
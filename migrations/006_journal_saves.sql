@@ -0,0 +1,9 @@
+-- migrations/006_journal_saves.sql
+-- Ключи идемпотентности сессий из локальной очереди: повторная отправка не дублирует записи
+
+CREATE TABLE IF NOT EXISTS journal_saves (
+    idempotency_key TEXT PRIMARY KEY,
+    saved_at        TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS journal_saves_saved_at_idx ON journal_saves (saved_at);
@@ -0,0 +1,21 @@
+-- migrations/007_temperature_alerts.sql
+-- Пороги температур для отдельных кофеен и чаты менеджеров для мгновенных алертов
+
+-- device_type: fridge / freezer; NULL — без границы. Без строки действуют общие пороги из .env
+CREATE TABLE IF NOT EXISTS shop_temp_limits (
+    coffeeshop_id TEXT NOT NULL,
+    device_type   TEXT NOT NULL CHECK (device_type IN ('fridge', 'freezer')),
+    min_temp      REAL,
+    max_temp      REAL,
+    PRIMARY KEY (coffeeshop_id, device_type)
+);
+
+-- Кофейни без своего чата шлют алерты в общий ALERT_CHAT_ID
+CREATE TABLE IF NOT EXISTS shop_alert_chats (
+    coffeeshop_id TEXT   NOT NULL,
+    chat_id       BIGINT NOT NULL,
+    PRIMARY KEY (coffeeshop_id, chat_id)
+);
+
+-- Прогрев нормы при старте читает последние дни журнала
+CREATE INDEX IF NOT EXISTS temp_journal_date_idx ON temp_journal (date);
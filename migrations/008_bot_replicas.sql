@@ -0,0 +1,7 @@
+-- migrations/008_bot_replicas.sql
+-- Живые реплики бота (CLUSTER_ENABLED=1): по ним строится кольцо для таймеров сессий
+
+CREATE TABLE IF NOT EXISTS bot_replicas (
+    replica_id   TEXT PRIMARY KEY,
+    heartbeat_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -0,0 +1,63 @@
+-- migrations/009_temp_journal_partitions.sql
+-- temp_journal по месяцам: запросы за день или период читают только свои партиции,
+-- а старые месяцы отсоединяются целиком (retention в migrate.py) без DELETE и долгого VACUUM
+
+CREATE OR REPLACE FUNCTION create_temp_journal_partition(month DATE) RETURNS TEXT AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month)::date;
+    partition  TEXT := format('temp_journal_p%s', to_char(start_date, 'YYYYMM'));
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF temp_journal FOR VALUES FROM (%L) TO (%L)',
+        partition, start_date, (start_date + INTERVAL '1 month')::date
+    );
+    RETURN partition;
+END $$ LANGUAGE plpgsql;
+
+-- Старая база: обычная таблица temp_journal переносится в партиционированную
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('temp_journal')) = 'r' THEN
+        ALTER TABLE temp_journal RENAME TO temp_journal_legacy;
+
+        CREATE TABLE temp_journal (
+            id            BIGINT GENERATED BY DEFAULT AS IDENTITY,
+            user_id       BIGINT  NOT NULL,
+            barista       TEXT    NOT NULL,
+            coffeeshop_id TEXT    NOT NULL,
+            date          DATE    NOT NULL,
+            time          TIME    NOT NULL,
+            device_type   TEXT    NOT NULL,
+            device_number INT     NOT NULL,
+            temperature   REAL    NOT NULL,
+            PRIMARY KEY (date, id)
+        ) PARTITION BY RANGE (date);
+
+        PERFORM create_temp_journal_partition(month::date)
+        FROM generate_series(
+            (SELECT date_trunc('month', MIN(date)) FROM temp_journal_legacy),
+            (SELECT date_trunc('month', MAX(date)) FROM temp_journal_legacy),
+            INTERVAL '1 month'
+        ) AS month;
+
+        INSERT INTO temp_journal (
+            user_id, barista, coffeeshop_id, date, time, device_type, device_number, temperature
+        )
+        SELECT user_id, barista, coffeeshop_id, date, time, device_type, device_number, temperature
+        FROM temp_journal_legacy;
+
+        DROP TABLE temp_journal_legacy;
+    END IF;
+END $$;
+
+-- Текущий месяц и три вперёд; дальше партиции создаёт ежедневная задача
+SELECT create_temp_journal_partition((date_trunc('month', now()) + make_interval(months => m))::date)
+FROM generate_series(0, 3) AS m;
+
+-- Вместо индекса по дате — отсечение партиций
+DROP INDEX IF EXISTS temp_journal_date_idx;
+
+-- get_sessions_count_today и напоминания: COUNT(DISTINCT time) по пользователю за день — только из индекса
+CREATE INDEX IF NOT EXISTS temp_journal_user_date_idx ON temp_journal (user_id, date) INCLUDE (time);
+-- Отчёты и выгрузка по кофейне за период, в порядке даты и времени
+CREATE INDEX IF NOT EXISTS temp_journal_shop_date_idx ON temp_journal (coffeeshop_id, date, time);
@@ -0,0 +1,9 @@
+-- migrations/010_recipient_mutes.sql
+-- Кто отключил уведомления до того, как попал в reminder_recipients, получил строку с muted = FALSE:
+-- выравниваем по mute_users (дальше это делают add_to_mute_users и UPSERT_RECIPIENT_SQL)
+
+INSERT INTO reminder_recipients (user_id, muted)
+SELECT user_id, TRUE FROM mute_users
+ON CONFLICT (user_id) DO UPDATE
+SET muted = TRUE
+WHERE NOT reminder_recipients.muted;
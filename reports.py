@@ -0,0 +1,185 @@
+# reports.py
+# Дневной отчёт менеджерам: график температур холодильников и морозилок каждой кофейни за день.
+# Рисование графиков — работа для процессора, поэтому оно идёт в пуле процессов, а не в цикле asyncio,
+# на котором работает dp.start_polling. Готовые файлы кэшируются по (кофейня, дата, число показаний):
+# новая сессия на любой реплике меняет ключ, поэтому устаревший график не отдаётся. Повторный запрос
+# отдаётся из кэша, а после первой отправки — по file_id Telegram, без повторной загрузки файла
+
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+
+import asyncpg
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import BufferedInputFile
+
+from anomalies import DEVICE_NAMES_RU, anomaly_detector
+from cache import MISSING, report_cache
+from database import DEVICE_TYPES_BY_RU, get_day_journal, get_day_readings_count
+
+REPORT_HOUR = int(os.getenv("REPORT_HOUR", "22"))
+REPORT_MINUTE = int(os.getenv("REPORT_MINUTE", "0"))
+REPORT_FORMAT = os.getenv("REPORT_FORMAT", "png")  # png | pdf
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+
+
+@dataclass
+class ReportArtifact:
+    filename: str
+    data: bytes
+    readings: int
+    out_of_range: int
+    file_id: str | None = None
+
+    def caption(self, shop: str, day: date) -> str:
+        text = f"📈 {shop} — температуры за {day:%d.%m.%Y}\nЗамеров: {self.readings}"
+        if self.out_of_range:
+            text += f", вне пределов: {self.out_of_range}"
+        return text
+
+
+# Выполняется в рабочем процессе: matplotlib грузится только там
+def render_day_chart(
+    title: str,
+    series: dict[str, dict[int, list[tuple[float, float]]]],
+    limits: dict[str, tuple[float | None, float | None]],
+    fmt: str,
+) -> bytes:
+    try:
+        from matplotlib.figure import Figure
+    except ImportError:
+        raise RuntimeError("Для графиков отчёта нужен пакет matplotlib")
+
+    figure = Figure(figsize=(10, 3.5 * len(series)), dpi=100)
+    axes = figure.subplots(len(series), 1, squeeze=False)[:, 0]
+    for ax, (device_type, devices) in zip(axes, series.items()):
+        for number, points in sorted(devices.items()):
+            hours, temps = zip(*points)
+            ax.plot(hours, temps, marker="o", label=f"№{number}")
+        low, high = limits[device_type]
+        if low is not None:
+            ax.axhline(low, color="tab:red", linestyle="--", linewidth=1)
+        if high is not None:
+            ax.axhline(high, color="tab:red", linestyle="--", linewidth=1)
+        ax.set_title(DEVICE_NAMES_RU.get(device_type, device_type))
+        ax.set_ylabel("°C")
+        ax.set_xlim(0, 24)
+        ax.set_xticks(range(0, 25, 2))
+        ax.grid(alpha=0.3)
+        ax.legend(loc="upper right", fontsize="small")
+    axes[-1].set_xlabel("Время, ч")
+    figure.suptitle(title)
+    figure.tight_layout()
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+# Точки для графика: тип устройства → номер → [(час дня, температура)], холодильники первыми
+def build_series(rows: list[asyncpg.Record]) -> dict[str, dict[int, list[tuple[float, float]]]]:
+    series: dict[str, dict[int, list[tuple[float, float]]]] = {device_type: {} for device_type in DEVICE_NAMES_RU}
+    for row in rows:
+        device_type = DEVICE_TYPES_BY_RU.get(row["device_type"], "freezer")
+        moment = row["time"]
+        series[device_type].setdefault(row["device_number"], []).append(
+            (moment.hour + moment.minute / 60, row["temperature"])
+        )
+    return {device_type: devices for device_type, devices in series.items() if devices}
+
+
+class ReportService:
+    def __init__(self, workers: int = REPORT_WORKERS, fmt: str = REPORT_FORMAT):
+        self.workers = workers
+        self.fmt = fmt
+        self.executor: ProcessPoolExecutor | None = None
+
+    # Пул поднимается при первом отчёте и не замедляет старт бота.
+    # spawn: рабочие процессы не наследуют потоки, соединения и сокеты бота
+    def get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self.executor
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def render(self, shop: str, day: date, rows: list[asyncpg.Record]) -> ReportArtifact:
+        # Журнал только дополняется, так что число строк — версия графика
+        key = (shop, day, len(rows))
+        cached = report_cache.get(key)
+        if cached is not MISSING:
+            return cached
+
+        series = build_series(rows)
+        limits = {device_type: anomaly_detector.limits(shop, device_type) for device_type in series}
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(
+            self.get_executor(), render_day_chart, f"{shop} — {day:%d.%m.%Y}", series, limits, self.fmt
+        )
+        artifact = ReportArtifact(
+            filename=f"report_{shop.split()[0]}_{day}.{self.fmt}",
+            data=data,
+            readings=len(rows),
+            out_of_range=sum(
+                anomaly_detector.is_out_of_range(shop, device_type, temp)
+                for device_type, devices in series.items()
+                for points in devices.values()
+                for _, temp in points
+            ),
+        )
+        report_cache.set(key, artifact)
+        return artifact
+
+    # Отчёт по запросу: shop — код как в temp_journal (CoffeeShop.code). Версию графика узнаём
+    # лёгким запросом к дневным агрегатам, журнал читаем только при промахе кэша; None, если за день нет записей
+    async def get(self, shop: str, day: date) -> ReportArtifact | None:
+        cached = report_cache.get((shop, day, await get_day_readings_count(day, shop)))
+        if cached is not MISSING:
+            return cached
+        rows = (await get_day_journal(day, shop)).get(shop)
+        if not rows:
+            return None
+        return await self.render(shop, day, rows)
+
+    async def send(self, bot: Bot, chat_id: int, shop: str, day: date, artifact: ReportArtifact):
+        document = artifact.file_id or BufferedInputFile(artifact.data, filename=artifact.filename)
+        message = await bot.send_document(chat_id, document, caption=artifact.caption(shop, day))
+        if artifact.file_id is None and message.document is not None:
+            artifact.file_id = message.document.file_id
+
+    # Ежедневная задача: журнал всех кофеен за день одним запросом, графики — параллельно в пуле
+    async def send_daily(self, bot: Bot, day: date | None = None):
+        day = day or date.today()
+        journal = await get_day_journal(day)
+        shops = [shop for shop in journal if anomaly_detector.chats_for(shop)]
+        skipped = len(journal) - len(shops)
+        if skipped:
+            logging.warning(f"[REPORT] Нет чата менеджеров у {skipped} кофеен — отчёт им не строим")
+
+        artifacts = await asyncio.gather(
+            *(self.render(shop, day, journal[shop]) for shop in shops), return_exceptions=True
+        )
+        sent = 0
+        for shop, artifact in zip(shops, artifacts):
+            if isinstance(artifact, BaseException):
+                logging.error(f"[REPORT] {shop}: график не построен: {artifact!r}")
+                continue
+            for chat_id in anomaly_detector.chats_for(shop):
+                try:
+                    await self.send(bot, chat_id, shop, day, artifact)
+                    sent += 1
+                except TelegramAPIError as e:
+                    logging.warning(f"[REPORT] {shop}: не отправлен в чат {chat_id}: {e}")
+        logging.info(f"[REPORT] Отчёты за {day}: кофеен {len(shops)}, отправлено {sent}")
+
+
+report_service = ReportService()
@@ -1,114 +1,109 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.base import BaseStorage, StorageKey
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from database import get_all_users, get_sessions_count_today
+from utils.keyboards import NEW_ENTRY_KB, RESUME_SESSION_KB
+from broadcast import broadcast_messages
+from fsm_storage import PostgresStorage, delete_expired_fsm_sessions
+from database import (
+    DAILY_SESSION_TARGET,
+    add_to_mute_users,
+    delete_old_journal_saves,
+    get_reminder_targets,
+    is_user_muted,
+    log_pool_stats,
+)
+from session_timers import session_timers
+from cluster import cluster, leader_only
+from migrate import maintain_journal_partitions
+from reports import REPORT_HOUR, REPORT_MINUTE, report_service
 import logging
-import asyncio
+from datetime import date
 
 scheduler = AsyncIOScheduler()
-active_sessions = set()
-muted_users = set()  # юзеры, которым не нужно ничего присылать
 
 
-# ⏱ Повторяющееся напоминание при незавершённой сессии
-async def start_session_timer(user_id: int, bot: Bot, storage: BaseStorage):
-    active_sessions.add(user_id)
+# ⏱ Напоминание при незавершённой сессии; True — напомнить ещё раз через интервал
+async def remind_unfinished_session(user_id: int, bot: Bot, storage: BaseStorage) -> bool:
+    if await is_user_muted(user_id):
+        logging.debug(f"[TIMER] user_id={user_id} отключил уведомления.")
+        return False
 
-    while True:
-        print(f"[TIMER] Ждём 30 минут для user_id={user_id}")
-        await asyncio.sleep(1800)  # 30 минут
+    key = StorageKey(bot_id=bot.id, user_id=user_id, chat_id=user_id)
+    current_state = await storage.get_state(key)
+    if current_state is None:
+        logging.debug(f"[TIMER] Сессия user_id={user_id} уже закрыта, таймер остановлен.")
+        return False
 
-        if user_id not in active_sessions:
-            print(f"[TIMER] Сессия завершена для user_id={user_id}, таймер остановлен.")
-            break
+    logging.info(f"[TIMER] Напоминание для user_id={user_id}, state={current_state}")
+    await bot.send_message(
+        user_id,
+        "⏰ Похоже, ты не закончил запись. Давай продолжим?",
+        reply_markup=RESUME_SESSION_KB
+    )
+    return True
 
-        if user_id in muted_users:
-            print(f"[TIMER] user_id={user_id} отключил уведомления.")
-            break
 
-        key = StorageKey(bot_id=bot.id, user_id=user_id, chat_id=user_id)
-        data = await storage.get_data(key)
-        current_state = data.get("state")
-        print(f"[TIMER] Напоминание для user_id={user_id}, state={current_state}")
+# Старт таймера для конкретного пользователя (повторный старт переставляет таймер)
+async def register_session_timer(user_id: int, bot: Bot, storage: BaseStorage):
+    logging.debug(f"[TIMER] Ждём {session_timers.interval // 60} минут для user_id={user_id}")
+    await session_timers.schedule(user_id)
 
-        await bot.send_message(
-            user_id,
-            "⏰ Похоже, ты не закончил запись. Давай продолжим?",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="▶️ Продолжить", callback_data="resume_session")]
-            ])
-        )
 
+# ✅ Завершение сессии — таймер снимается сразу
+async def mark_session_complete(user_id: int):
+    await session_timers.cancel(user_id)
+
+
+def _plural(n: int, one: str, few: str, many: str) -> str:
+    if n % 10 == 1 and n % 100 != 11:
+        return one
+    if 2 <= n % 10 <= 4 and not 12 <= n % 100 <= 14:
+        return few
+    return many
 
-# Старт таймера для конкретного пользователя
-async def register_session_timer(user_id: int, bot: Bot, storage: BaseStorage):
-    asyncio.create_task(start_session_timer(user_id, bot, storage))
-
-
-# ✅ Завершение сессии
-def mark_session_complete(user_id: int):
-    active_sessions.discard(user_id)
-
-    # Напоминания 3 раза в день, если записей < 3 (чтобы вернуть — убери решетки ниже)
-    #
-    # async def send_reminder(bot: Bot):
-    #     users = await get_all_users()
-    #     for user_id in users:
-    #         if user_id in muted_users:
-    #             logging.info(f"[REMINDER] user_id={user_id} отключил уведомления.")
-    #             continue
-    #
-    #         session_count = await get_sessions_count_today(user_id)
-    #
-    #         if session_count == 0:
-    #             text = "сегодня у тебя ещё нет ни одной записи"
-    #         elif session_count == 1:
-    #             text = "сегодня у тебя только 1 запись"
-    #         elif session_count == 2:
-    #             text = "сегодня у тебя только 2 записи"
-    #         else:
-    #             logging.info(f"[REMINDER] ✅ user_id={user_id} — {session_count} записей, не беспокоим")
-    #             continue
-    #
-    #         await bot.send_message(
-    #             user_id,
-    #             f"🔔 Напоминание: {text}. Нужно минимум 3. Заполним журнал? 🥺",
-    #             reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-    #                 [InlineKeyboardButton(text="🔄 Начать новую запись", callback_data="new_entry")]
-    #             ])
-    #         )
-
-
-# 🚀 Запуск планировщика (чтобы вернуть 12:00, 16:00, 20:00 — убери решетки ниже)
-#
-# def start_scheduler(bot: Bot, dp: Dispatcher):
-#     scheduler.add_job(
-#         send_reminder,
-#         trigger=CronTrigger(hour="12,16,20"),
-#         args=[bot],
-#         id="daily_reminders"
-#     )
-#     scheduler.start()
 
+# Текст напоминания зависит от того, сколько проверок уже сделано сегодня
+def reminder_text(session_count: int, coffeeshop_id: str | None) -> str:
+    where = f"в {coffeeshop_id}" if coffeeshop_id else "у тебя"
+    if session_count == 0:
+        status = f"сегодня {where} ещё нет ни одной записи"
+    else:
+        status = f"сегодня {where} только {session_count} {_plural(session_count, 'запись', 'записи', 'записей')}"
+    return f"🔔 Напоминание: {status}. Нужно минимум {DAILY_SESSION_TARGET}. Заполним журнал? 📝"
+
+
+# Напоминаем только тем, у кого сегодня меньше DAILY_SESSION_TARGET проверок
+@leader_only
 async def send_reminder(bot: Bot):
-    users = await get_all_users()
-    for user_id in users:
-        if user_id in muted_users:
-            logging.info(f"[REMINDER] user_id={user_id} отключил уведомления.")
-            continue
-        await bot.send_message(
-            user_id,
-            "🔔 Напоминание: пора заполнить журнал 📝❤️",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🔄 Начать новую запись", callback_data="new_entry")]
-            ])
-        )
+    # Один сгруппированный запрос; отключившие уведомления (/stop) уже исключены
+    targets = await get_reminder_targets(date.today())
+    if not targets:
+        logging.info("[REMINDER] Норма на сегодня выполнена у всех — напоминания не нужны")
+        return
+
+    stats = await broadcast_messages(
+        bot,
+        ((row["user_id"], reminder_text(row["session_count"], row["coffeeshop_id"])) for row in targets),
+        reply_markup=NEW_ENTRY_KB
+    )
+
+    # Кто заблокировал бота — больше не беспокоим
+    for user_id in stats.blocked_users:
+        await add_to_mute_users(user_id)
 
 
 # Запуск планировщика
-def start_scheduler(bot: Bot, dp: Dispatcher):
+async def start_scheduler(bot: Bot, dp: Dispatcher):
+    # Таймеры незавершённых сессий: один сервис на реплику, пользователи делятся между репликами
+    session_timers.owns = cluster.owns
+    session_timers.origin = cluster.replica_id if cluster.enabled else None
+    cluster.on_ring_change = session_timers.rebalance
+    cluster.on_timer_notify = session_timers.apply_remote
+    await session_timers.restore()
+    session_timers.start(lambda user_id: remind_unfinished_session(user_id, bot, dp.storage))
+
     scheduler.add_job(
         send_reminder,
         trigger=CronTrigger(hour="9-20", minute=0),
@@ -116,4 +111,37 @@ def start_scheduler(bot: Bot, dp: Dispatcher):
         id="daily_reminders",
         misfire_grace_time=60
     )
+    # Графики температур за день — менеджерам после закрытия
+    scheduler.add_job(
+        leader_only(report_service.send_daily),
+        trigger=CronTrigger(hour=REPORT_HOUR, minute=REPORT_MINUTE),
+        args=[bot],
+        id="daily_reports",
+        misfire_grace_time=600
+    )
+    # Периодически пишем в лог загрузку пула соединений
+    scheduler.add_job(
+        log_pool_stats,
+        trigger=IntervalTrigger(minutes=5),
+        id="db_pool_stats"
+    )
+    # Старые ключи идемпотентности локальной очереди журнала
+    scheduler.add_job(
+        leader_only(delete_old_journal_saves),
+        trigger=CronTrigger(hour=3, minute=30),
+        id="journal_saves_cleanup"
+    )
+    # Партиции temp_journal наперёд и перенос в архив месяцев старше JOURNAL_RETENTION_MONTHS
+    scheduler.add_job(
+        leader_only(maintain_journal_partitions),
+        trigger=CronTrigger(hour=3, minute=45),
+        id="journal_partitions"
+    )
+    # Чистим брошенные сессии, если FSM хранится в БД
+    if isinstance(dp.storage, PostgresStorage):
+        scheduler.add_job(
+            leader_only(delete_expired_fsm_sessions),
+            trigger=IntervalTrigger(hours=1),
+            id="fsm_cleanup"
+        )
     scheduler.start()
@@ -0,0 +1,165 @@
+# session_timers.py
+# Один сервис таймеров для всех незавершённых сессий: куча по времени срабатывания,
+# не больше одного таймера на пользователя, ожидающие таймеры хранятся в БД
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from database import delete_session_timer, load_session_timers, save_session_timer
+
+# Через сколько секунд напомнить о незавершённой сессии
+SESSION_REMINDER_INTERVAL = int(os.getenv("SESSION_REMINDER_INTERVAL", "1800"))
+
+TimerCallback = Callable[[int], Awaitable[bool]]
+
+
+class SessionTimers:
+    def __init__(self, interval: int = SESSION_REMINDER_INTERVAL):
+        self.interval = interval
+        self.callback: TimerCallback | None = None
+        # Элементы кучи: [due, seq, user_id, active]; отменённые помечаются active=False
+        self.heap: list[list] = []
+        self.entries: dict[int, list] = {}
+        # Пользователи, чьё напоминание отправляется прямо сейчас
+        self.firing: set[int] = set()
+        # Ссылки на задачи напоминаний: иначе сборщик мусора может снять задачу посреди отправки
+        self.fire_tasks: set[asyncio.Task] = set()
+        self.counter = itertools.count()
+        self.wakeup = asyncio.Event()
+        self.task: asyncio.Task | None = None
+        # Несколько реплик: какие пользователи наши и от чьего имени рассылать уведомления
+        self.owns: Callable[[int], bool] = lambda user_id: True
+        self.origin: str | None = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, user_id: int):
+        return user_id in self.entries
+
+    # Поставить таймер в памяти (старый таймер пользователя отменяется)
+    def _push(self, user_id: int, due: float):
+        self._drop(user_id)
+        entry = [due, next(self.counter), user_id, True]
+        self.entries[user_id] = entry
+        heapq.heappush(self.heap, entry)
+        if self.heap[0] is entry:
+            self.wakeup.set()
+
+    def _drop(self, user_id: int):
+        entry = self.entries.pop(user_id, None)
+        if entry is not None:
+            entry[3] = False
+            # Не даём куче разрастись из-за отменённых элементов
+            if len(self.heap) > 2 * len(self.entries) + 64:
+                self.heap = [e for e in self.heap if e[3]]
+                heapq.heapify(self.heap)
+
+    async def schedule(self, user_id: int, delay: float | None = None):
+        due = time.time() + (self.interval if delay is None else delay)
+        self.firing.discard(user_id)
+        # Чужой пользователь: таймер только в БД, владелец узнает о нём через NOTIFY
+        if self.owns(user_id):
+            self._push(user_id, due)
+        else:
+            self._drop(user_id)
+        await save_session_timer(user_id, datetime.fromtimestamp(due, tz=timezone.utc), self.origin)
+
+    async def cancel(self, user_id: int):
+        if user_id in self.entries or user_id in self.firing or not self.owns(user_id):
+            self._drop(user_id)
+            self.firing.discard(user_id)
+            await delete_session_timer(user_id, self.origin)
+
+    # Восстанавливаем ожидающие таймеры после перезапуска (только свои)
+    async def restore(self):
+        rows = await load_session_timers()
+        restored = 0
+        for user_id, due_at in rows:
+            if self.owns(user_id):
+                self._push(user_id, due_at.timestamp())
+                restored += 1
+        logging.info(f"[TIMER] Восстановлено таймеров: {restored} из {len(rows)}")
+
+    # Состав реплик изменился: отдаём чужие таймеры и забираем свои из БД
+    async def rebalance(self):
+        for user_id in [user_id for user_id in self.entries if not self.owns(user_id)]:
+            self._drop(user_id)
+        rows = await load_session_timers()
+        for user_id, due_at in rows:
+            if self.owns(user_id) and user_id not in self.entries and user_id not in self.firing:
+                self._push(user_id, due_at.timestamp())
+        logging.info(f"[TIMER] Перераспределение: своих таймеров {len(self.entries)} из {len(rows)}")
+
+    # Таймер поставили или сняли на другой реплике
+    def apply_remote(self, user_id: int, due: float | None):
+        if not self.owns(user_id):
+            return
+        self.firing.discard(user_id)
+        if due is None:
+            self._drop(user_id)
+        else:
+            self._push(user_id, due)
+
+    def start(self, callback: TimerCallback):
+        self.callback = callback
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _run(self):
+        while True:
+            while self.heap and not self.heap[0][3]:
+                heapq.heappop(self.heap)
+
+            self.wakeup.clear()
+            if not self.heap:
+                await self.wakeup.wait()
+                continue
+
+            delay = self.heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            entry = heapq.heappop(self.heap)
+            user_id = entry[2]
+            del self.entries[user_id]
+            self.firing.add(user_id)
+            task = asyncio.create_task(self._fire(user_id))
+            self.fire_tasks.add(task)
+            task.add_done_callback(self.fire_tasks.discard)
+
+    async def _fire(self, user_id: int):
+        try:
+            repeat = await self.callback(user_id)
+        except Exception:
+            logging.exception(f"[TIMER] Ошибка напоминания для user_id={user_id}")
+            repeat = True
+
+        # Таймер отменили или переставили, пока шло напоминание
+        if user_id not in self.firing:
+            return
+        self.firing.discard(user_id)
+
+        # Пока сессия не завершена — напоминаем снова через интервал
+        if repeat:
+            await self.schedule(user_id)
+        else:
+            await delete_session_timer(user_id, self.origin)
+
+
+session_timers = SessionTimers()
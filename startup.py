@@ -0,0 +1,53 @@
+# startup.py
+# Профиль холодного старта (STARTUP_PROFILE=1): время импортов, каждого шага main()
+# и до первого обработанного апдейта. Импорты по модулям — benchmarks/startup_profile.py (-X importtime)
+
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "0") == "1"
+
+
+class StartupProfile:
+    def __init__(self, enabled: bool = STARTUP_PROFILE):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.phases: list[tuple[str, float]] = []
+        self.first_update_seen = False
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def report(self, title: str):
+        if not self.enabled:
+            return
+        lines = [f"{phase}: {seconds * 1000:.0f} ms" for phase, seconds in self.phases]
+        logging.info(f"[STARTUP] {title} за {self.elapsed() * 1000:.0f} ms — " + ", ".join(lines))
+
+    # Внешний middleware на dp.update: один раз фиксирует время до первого апдейта
+    async def first_update_middleware(
+        self,
+        handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+        event: Any,
+        data: Dict[str, Any],
+    ) -> Any:
+        if self.first_update_seen:
+            return await handler(event, data)
+        self.first_update_seen = True
+        try:
+            return await handler(event, data)
+        finally:
+            self.mark("первый апдейт")
+            self.report("Первый апдейт обработан")
+
+
+# Создаётся при импорте bot_barista — до импорта aiogram и остальных модулей
+startup_profile = StartupProfile()
@@ -0,0 +1,7 @@
+# tests/conftest.py
+# Модули бота лежат в корне репозитория: тесты импортируют их так же, как bot_barista
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
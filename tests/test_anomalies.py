@@ -0,0 +1,25 @@
+# tests/test_anomalies.py
+# Норма устройства: прогрев историей и проверка новых показаний по одним правилам
+
+from anomalies import AnomalyDetector
+
+LIMITS = {"fridge": (2.0, 6.0), "freezer": (None, -18.0)}
+
+
+def test_warm_skips_out_of_range_like_check():
+    warmed = AnomalyDetector(LIMITS)
+    checked = AnomalyDetector(LIMITS)
+    history = [("0-1", "fridge", 1, temp) for temp in (4.0, 4.5, 15.0, 4.2, 1.0, 3.8)]
+
+    assert warmed.warm(history) == 4
+    for shop, device_type, number, temp in history:
+        checked.check(shop, device_type, number, temp)
+
+    assert warmed.baselines[("0-1", "fridge", 1)] == checked.baselines[("0-1", "fridge", 1)]
+
+
+def test_warm_respects_shop_limits():
+    detector = AnomalyDetector(LIMITS)
+    detector.configure([("0-1", "fridge", 0.0, 10.0)], [])
+    assert detector.warm([("0-1", "fridge", 1, 8.0), ("0-2", "fridge", 1, 8.0)]) == 1
+    assert ("0-2", "fridge", 1) not in detector.baselines
@@ -0,0 +1,59 @@
+# tests/test_broadcast.py
+# Ограничитель скорости рассылки и общая пауза после RetryAfter
+
+import asyncio
+import time
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from broadcast import Broadcaster, TokenBucket
+
+
+def test_token_bucket_limits_rate():
+    async def main():
+        bucket = TokenBucket(rate=100, capacity=5)
+        started = time.monotonic()
+        for _ in range(15):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # 5 токенов сразу, остальные 10 — по 10 ms
+    assert 0.08 < asyncio.run(main()) < 0.5
+
+
+def test_token_bucket_pause_holds_all_acquires():
+    async def main():
+        bucket = TokenBucket(rate=1000, capacity=10)
+        bucket.pause(0.2)
+        started = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+        return time.monotonic() - started
+
+    assert 0.2 <= asyncio.run(main()) < 0.6
+
+
+class FloodBot:
+    def __init__(self):
+        self.sent: list[tuple[int, float]] = []
+        self.flooded = False
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        if not self.flooded:
+            self.flooded = True
+            raise TelegramRetryAfter(SendMessage(chat_id=chat_id, text=text), "Flood control exceeded", 1)
+        self.sent.append((chat_id, time.monotonic()))
+
+
+def test_retry_after_pauses_every_chat():
+    async def main():
+        bot = FloodBot()
+        started = time.monotonic()
+        stats = await Broadcaster(bot, global_rate=1000).broadcast_messages([(1, "a"), (2, "b"), (3, "c")])
+        return bot, stats, started
+
+    bot, stats, started = asyncio.run(main())
+    assert stats.sent == 3 and stats.retried == 1
+    assert sorted(chat_id for chat_id, _ in bot.sent) == [1, 2, 3]
+    # После RetryAfter ни один чат не получил сообщение раньше, чем через retry_after
+    assert all(moment - started >= 1 for _, moment in bot.sent)
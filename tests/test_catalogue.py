@@ -0,0 +1,27 @@
+# tests/test_catalogue.py
+# Поиск кофеен по каталогу: код, название, несколько слов запроса; выбор одной кофейни для /report
+
+from catalogue import Catalogue, CoffeeShop
+
+SHOPS = [
+    CoffeeShop(1, "Москва 0-1 (Омега Плаза)"),
+    CoffeeShop(2, "Москва 0-10 (Магистраль Плаза)"),
+    CoffeeShop(3, "Москва 0-16.5 (Т-Банк | 5 этаж)"),
+    CoffeeShop(4, "Москва 0-16.7 (Т-Банк | 7 этаж)"),
+]
+
+
+def test_catalogue_search_prefers_exact_code():
+    catalogue = Catalogue(SHOPS)
+    assert [shop.id for shop in catalogue.search("0-1")] == [1, 2, 3, 4]
+    assert [shop.id for shop in catalogue.search("плаза")] == [1, 2]
+    assert [shop.id for shop in catalogue.search("т-банк 7")] == [4]
+    assert catalogue.search("") == []
+
+
+def test_catalogue_resolve():
+    catalogue = Catalogue(SHOPS)
+    assert catalogue.resolve("0-1").id == 1
+    assert catalogue.resolve("0-16.5").code == "0-16.5 (Т-Банк | 5 этаж)"
+    assert catalogue.resolve("0-16") is None
+    assert catalogue.resolve("0-99") is None
@@ -0,0 +1,50 @@
+# tests/test_cluster.py
+# Кольцо реплик: владелец стабилен и при смене состава переезжает малая доля пользователей;
+# cron-задачи с leader_only выполняет только лидер
+
+import asyncio
+from collections import Counter
+
+from cluster import HashRing, cluster, leader_only
+
+
+def test_single_replica_owns_everyone():
+    ring = HashRing(["a"])
+    assert {ring.owner(user_id) for user_id in range(100)} == {"a"}
+
+
+def test_empty_ring_has_no_owner():
+    assert HashRing([]).owner(1) is None
+
+
+def test_owner_does_not_depend_on_replica_order():
+    assert [HashRing(["a", "b", "c"]).owner(u) for u in range(500)] == \
+        [HashRing(["c", "a", "b"]).owner(u) for u in range(500)]
+
+
+def test_load_is_spread_and_moves_little_on_join():
+    users = range(10_000)
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+    counts = Counter(before.owner(u) for u in users)
+    assert min(counts.values()) > 2_000
+    moved = [u for u in users if before.owner(u) != after.owner(u)]
+    # Переезжают только пользователи новой реплики — около четверти
+    assert all(after.owner(u) == "d" for u in moved)
+    assert len(moved) < 4_000
+
+
+def test_leader_only_runs_on_leader(monkeypatch):
+    calls = []
+
+    @leader_only
+    async def job(value):
+        calls.append(value)
+        return value
+
+    monkeypatch.setattr(cluster, "leader", False)
+    assert asyncio.run(job(1)) is None
+    monkeypatch.setattr(cluster, "leader", True)
+    assert asyncio.run(job(2)) == 2
+    assert calls == [2]
+    assert job.__name__ == "job"
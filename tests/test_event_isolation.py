@@ -0,0 +1,85 @@
+# tests/test_event_isolation.py
+# Замок пользователя по ключу и отбрасывание повторных нажатий кнопки
+
+import asyncio
+from types import SimpleNamespace
+
+from fsm_storage import KeyedLocks
+from middlewares.debounce import CallbackDebounceMiddleware
+
+
+def test_keyed_locks_serialize_one_key_and_clean_up():
+    async def main():
+        locks = KeyedLocks()
+        events = []
+
+        async def work(key, name):
+            async with locks.hold(key):
+                events.append(("in", name))
+                await asyncio.sleep(0.01)
+                events.append(("out", name))
+
+        await asyncio.gather(work("a", 1), work("a", 2), work("b", 3))
+        return events, len(locks)
+
+    events, left = asyncio.run(main())
+    assert events.index(("out", 1)) < events.index(("in", 2))
+    # Другой ключ не ждёт первый
+    assert events.index(("in", 3)) < events.index(("out", 1))
+    assert left == 0
+
+
+def make_update(data: str, message_id: int = 10):
+    answered = []
+
+    async def answer():
+        answered.append(data)
+
+    callback = SimpleNamespace(
+        data=data,
+        from_user=SimpleNamespace(id=1),
+        message=SimpleNamespace(message_id=message_id),
+        inline_message_id=None,
+        answer=answer,
+    )
+    return SimpleNamespace(callback_query=callback), answered
+
+
+def test_debounce_drops_repeated_tap_only():
+    async def main():
+        middleware = CallbackDebounceMiddleware(debounce_seconds=60)
+        handled = []
+
+        async def handler(event, data):
+            handled.append(event.callback_query.data)
+            return "ok"
+
+        data = {"event_chat": SimpleNamespace(id=5)}
+        first, _ = make_update("fridge_1")
+        repeat, answered = make_update("fridge_1")
+        other, _ = make_update("fridge_2")
+        other_message, _ = make_update("fridge_1", message_id=11)
+        results = [await middleware(handler, update, data) for update in (first, repeat, other, other_message)]
+        return results, handled, answered, middleware.dropped
+
+    results, handled, answered, dropped = asyncio.run(main())
+    assert results == ["ok", None, "ok", "ok"]
+    assert handled == ["fridge_1", "fridge_2", "fridge_1"]
+    # «Часики» на повторном нажатии сняты
+    assert answered == ["fridge_1"]
+    assert dropped == 1
+
+
+def test_debounce_disabled_and_other_updates_pass():
+    async def main():
+        middleware = CallbackDebounceMiddleware(debounce_seconds=0)
+
+        async def handler(event, data):
+            return "ok"
+
+        tap, _ = make_update("fridge_1")
+        results = [await middleware(handler, tap, {}) for _ in range(2)]
+        results.append(await middleware(handler, SimpleNamespace(callback_query=None), {}))
+        return results
+
+    assert asyncio.run(main()) == ["ok", "ok", "ok"]
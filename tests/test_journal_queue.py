@@ -0,0 +1,63 @@
+# tests/test_journal_queue.py
+# Перенос очереди журнала в Postgres: пачкой, а при ошибке — по одной сессии
+
+import asyncio
+from datetime import date, time
+
+import journal_queue as module
+from journal_queue import JournalQueue
+
+ENTRIES = [{"type": "fridge", "number": 1, "temp": 4.0}]
+
+
+def test_flush_sends_batch_in_one_call(tmp_path, monkeypatch):
+    batches, single = [], []
+
+    async def save_sessions(sessions):
+        batches.append([session["idempotency_key"] for session in sessions])
+        return batches[-1]
+
+    async def save_one(**session):
+        single.append(session["idempotency_key"])
+
+    monkeypatch.setattr(module, "save_temperature_sessions", save_sessions)
+    monkeypatch.setattr(module, "save_temperature_entries", save_one)
+
+    async def main():
+        queue = JournalQueue(str(tmp_path / "queue.sqlite3"))
+        await queue.open()
+        keys = [await queue.enqueue(i, "Alex", "0-1", ENTRIES, date(2025, 1, 1), time(9, 0)) for i in range(3)]
+        sent = await queue.flush()
+        return keys, sent, await queue.pending()
+
+    keys, sent, pending = asyncio.run(main())
+    assert batches == [keys] and single == []
+    assert sent == 3 and pending == 0
+
+
+def test_failed_batch_falls_back_and_defers_bad_session(tmp_path, monkeypatch):
+    saved = []
+
+    async def save_sessions(sessions):
+        raise RuntimeError("bad row")
+
+    async def main():
+        queue = JournalQueue(str(tmp_path / "queue.sqlite3"))
+        await queue.open()
+        keys = [await queue.enqueue(i, "Alex", "0-1", ENTRIES, date(2025, 1, 1), time(9, 0)) for i in range(3)]
+
+        async def save_one(**session):
+            if session["idempotency_key"] == keys[1]:
+                raise RuntimeError("bad row")
+            saved.append(session["idempotency_key"])
+
+        monkeypatch.setattr(module, "save_temperature_entries", save_one)
+        sent = await queue.flush()
+        cursor = queue.db.execute("SELECT idempotency_key, attempts FROM journal_queue ORDER BY id")
+        return keys, sent, cursor.fetchall()
+
+    monkeypatch.setattr(module, "save_temperature_sessions", save_sessions)
+    keys, sent, left = asyncio.run(main())
+    # Первая записана, на второй остановились до следующей попытки
+    assert saved == [keys[0]] and sent == 1
+    assert left == [(keys[1], 1), (keys[2], 0)]
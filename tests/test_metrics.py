@@ -0,0 +1,28 @@
+# tests/test_metrics.py
+# Метки событий в метриках: известные команды, чужой текст после «/», callback_data
+
+from aiogram.types import CallbackQuery, Message
+
+from middlewares.metrics import event_prefix
+
+
+def message(text: str | None) -> Message:
+    return Message.model_construct(text=text)
+
+
+def test_event_prefix_known_commands():
+    assert event_prefix(message("/stats")) == "/stats"
+    assert event_prefix(message("/report 0-1 2025-01-01")) == "/report"
+    assert event_prefix(message("/start@barista_bot")) == "/start"
+
+
+def test_event_prefix_unknown_commands_share_one_label():
+    assert event_prefix(message("/random_garbage_123")) == "other"
+    assert event_prefix(message("/STATS")) == "other"
+
+
+def test_event_prefix_other_events():
+    assert event_prefix(message("Омега")) == ""
+    assert event_prefix(message(None)) == ""
+    assert event_prefix(CallbackQuery.model_construct(data="select_index:3")) == "select_index:"
+    assert event_prefix(None) == ""
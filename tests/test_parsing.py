@@ -0,0 +1,65 @@
+# tests/test_parsing.py
+# Разбор температур: одно значение и вся сессия одним сообщением
+
+import pytest
+
+from utils.parsing import TemperatureParseError, is_bulk_entry, parse_bulk_entries, parse_temperature
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("3.5", 3.5),
+    ("4,3", 4.3),
+    ("- 18", -18.0),
+    ("−18,5", -18.5),
+    ("+5", 5.0),
+    ("  6 ", 6.0),
+])
+def test_parse_temperature(text, expected):
+    assert parse_temperature(text) == expected
+
+
+@pytest.mark.parametrize("text", ["abc", "", "4..3", "60", "-51"])
+def test_parse_temperature_rejects(text):
+    with pytest.raises(TemperatureParseError):
+        parse_temperature(text)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Х 3.5 4.1", True),
+    ("x 3", True),
+    ("Холодильник: 4", True),
+    ("М -18", True),
+    ("3.5", False),
+    ("Иван Петров", False),
+    (None, False),
+])
+def test_is_bulk_entry(text, expected):
+    assert is_bulk_entry(text) is expected
+
+
+def test_parse_bulk_entries():
+    assert parse_bulk_entries("Х 3.5 4,1 / М - 18 -19.5") == [
+        ("fridge", 3.5), ("fridge", 4.1), ("freezer", -18.0), ("freezer", -19.5),
+    ]
+
+
+def test_parse_bulk_entries_mixed_markers_and_separators():
+    assert parse_bulk_entries("x 3,5, 4; m −18 Х 2") == [
+        ("fridge", 3.5), ("fridge", 4.0), ("freezer", -18.0), ("fridge", 2.0),
+    ]
+
+
+def test_parse_bulk_entries_requires_marker_first():
+    with pytest.raises(TemperatureParseError, match="Начни с типа устройства"):
+        parse_bulk_entries("3.5 Х 4")
+
+
+def test_parse_bulk_entries_reports_every_bad_value():
+    with pytest.raises(TemperatureParseError) as error:
+        parse_bulk_entries("Х 3.5 99 / М abc")
+    assert "99" in str(error.value) and "abc" in str(error.value)
+
+
+def test_parse_bulk_entries_without_values():
+    with pytest.raises(TemperatureParseError, match="ни одной"):
+        parse_bulk_entries("Х / М")
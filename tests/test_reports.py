@@ -0,0 +1,62 @@
+# tests/test_reports.py
+# Кэш графиков дневного отчёта: версия — число показаний за день, общее для всех реплик
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import pytest
+
+import reports as module
+from cache import report_cache
+from reports import ReportService
+
+DAY = date(2025, 1, 1)
+
+
+def reading(hour: int, temp: float) -> dict:
+    return {"coffeeshop_id": "0-1", "time": datetime(2025, 1, 1, hour), "device_type": "Холодильник",
+            "device_number": 1, "temperature": temp}
+
+
+@pytest.fixture
+def journal(monkeypatch):
+    rows = [reading(9, 4.0), reading(12, 4.5)]
+    calls = {"journal": 0, "render": 0}
+
+    async def get_day_readings_count(day, shop):
+        return len(rows)
+
+    async def get_day_journal(day, shop=None):
+        calls["journal"] += 1
+        return {"0-1": list(rows)}
+
+    def render_day_chart(title, series, limits, fmt):
+        calls["render"] += 1
+        return b"chart"
+
+    monkeypatch.setattr(module, "get_day_readings_count", get_day_readings_count)
+    monkeypatch.setattr(module, "get_day_journal", get_day_journal)
+    monkeypatch.setattr(module, "render_day_chart", render_day_chart)
+    report_cache.clear()
+    yield rows, calls
+    report_cache.clear()
+
+
+def test_report_cached_until_new_readings(journal, monkeypatch):
+    rows, calls = journal
+    service = ReportService()
+    monkeypatch.setattr(service, "get_executor", lambda: ThreadPoolExecutor(1))
+
+    async def main():
+        first = await service.get("0-1", DAY)
+        again = await service.get("0-1", DAY)
+        # Сессию сохранила другая реплика: локальный кэш о ней не знает, но число показаний выросло
+        rows.append(reading(15, 5.0))
+        fresh = await service.get("0-1", DAY)
+        return first, again, fresh
+
+    first, again, fresh = asyncio.run(main())
+    assert again is first
+    assert fresh is not first and fresh.readings == 3
+    assert calls == {"journal": 2, "render": 2}
@@ -0,0 +1,141 @@
+# tests/test_session_timers.py
+# Куча таймеров незавершённых сессий: порядок срабатывания, перестановка, отмена, повтор
+
+import asyncio
+
+import pytest
+
+import session_timers as module
+from session_timers import SessionTimers
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    # Вместо БД — словарь user_id -> есть ли сохранённый таймер
+    saved: dict[int, bool] = {}
+
+    async def save(user_id, due_at, origin=None):
+        saved[user_id] = True
+
+    async def delete(user_id, origin=None):
+        saved[user_id] = False
+
+    monkeypatch.setattr(module, "save_session_timer", save)
+    monkeypatch.setattr(module, "delete_session_timer", delete)
+    return saved
+
+
+def run_timers(scenario, callback, interval: float = 10):
+    async def main():
+        timers = SessionTimers(interval=interval)
+        timers.start(callback)
+        try:
+            await scenario(timers)
+        finally:
+            await timers.stop()
+    asyncio.run(main())
+
+
+def test_fires_in_due_order(stored):
+    fired = []
+
+    async def callback(user_id):
+        fired.append(user_id)
+        return False
+
+    async def scenario(timers):
+        await timers.schedule(1, delay=0.06)
+        await timers.schedule(2, delay=0.02)
+        await timers.schedule(3, delay=0.04)
+        await asyncio.sleep(0.15)
+        assert len(timers) == 0
+
+    run_timers(scenario, callback)
+    assert fired == [2, 3, 1]
+    assert stored == {1: False, 2: False, 3: False}
+
+
+def test_reschedule_keeps_one_timer_per_user(stored):
+    fired = []
+
+    async def callback(user_id):
+        fired.append(user_id)
+        return False
+
+    async def scenario(timers):
+        await timers.schedule(1, delay=0.02)
+        await timers.schedule(1, delay=0.08)
+        assert len(timers) == 1
+        await asyncio.sleep(0.05)
+        assert fired == []
+        await asyncio.sleep(0.08)
+
+    run_timers(scenario, callback)
+    assert fired == [1]
+
+
+def test_cancel_drops_timer(stored):
+    fired = []
+
+    async def callback(user_id):
+        fired.append(user_id)
+        return False
+
+    async def scenario(timers):
+        await timers.schedule(1, delay=0.02)
+        await timers.schedule(2, delay=0.02)
+        await timers.cancel(1)
+        assert 1 not in timers and 2 in timers
+        await asyncio.sleep(0.06)
+
+    run_timers(scenario, callback)
+    assert fired == [2]
+    assert stored[1] is False
+
+
+def test_repeat_reschedules_until_done(stored):
+    fired = []
+
+    async def callback(user_id):
+        fired.append(user_id)
+        return len(fired) < 3
+
+    async def scenario(timers):
+        await timers.schedule(7, delay=0)
+        await asyncio.sleep(0.2)
+        assert 7 not in timers
+
+    run_timers(scenario, callback, interval=0.03)
+    assert fired == [7, 7, 7]
+    assert stored[7] is False
+
+
+def test_error_in_callback_retries(stored):
+    calls = []
+
+    async def callback(user_id):
+        calls.append(user_id)
+        if len(calls) == 1:
+            raise RuntimeError("Telegram недоступен")
+        return False
+
+    async def scenario(timers):
+        await timers.schedule(5, delay=0)
+        await asyncio.sleep(0.12)
+
+    run_timers(scenario, callback, interval=0.03)
+    assert calls == [5, 5]
+
+
+def test_foreign_users_stay_in_db_only(stored):
+    async def callback(user_id):
+        return False
+
+    async def scenario(timers):
+        timers.owns = lambda user_id: user_id % 2 == 0
+        await timers.schedule(1, delay=0.01)
+        await timers.schedule(2, delay=1)
+        assert 1 not in timers and 2 in timers
+        assert stored == {1: True, 2: True}
+
+    run_timers(scenario, callback)
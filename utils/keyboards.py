@@ -1,18 +1,128 @@
 # utils/keyboards.py
-# Общие инлайн-клавиатуры для бота
+# Общие инлайн-клавиатуры для бота: собираются один раз и переиспользуются во всех сообщениях
+
+import json
+from functools import lru_cache
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from aiohttp import FormData
+from pydantic import ConfigDict, PrivateAttr
+
+from catalogue import CoffeeShop, catalogue
+
+PER_PAGE = 5
+
+
+# Неизменяемая клавиатура с заранее сериализованным JSON
+class StaticKeyboard(InlineKeyboardMarkup):
+    model_config = ConfigDict(**{**InlineKeyboardMarkup.model_config, "frozen": True})
+    _serialized: str = PrivateAttr(default="")
+
+    @property
+    def serialized(self) -> str:
+        return self._serialized
+
+
+def _static(rows: list[list[InlineKeyboardButton]]) -> StaticKeyboard:
+    keyboard = StaticKeyboard(inline_keyboard=rows)
+    keyboard._serialized = json.dumps(keyboard.model_dump(exclude_none=True, warnings=False))
+    return keyboard
+
+
+# Сессия, которая подставляет готовый JSON клавиатуры вместо сериализации на каждый запрос
+class KeyboardAwareSession(AiohttpSession):
+    def build_form_data(self, bot: Bot, method: TelegramMethod[TelegramType]) -> FormData:
+        keyboard = getattr(method, "reply_markup", None)
+        if not isinstance(keyboard, StaticKeyboard):
+            return super().build_form_data(bot, method)
+
+        form = FormData(quote_fields=False)
+        files: dict[str, Any] = {}
+        for key, value in method.model_dump(warnings=False, exclude={"reply_markup"}).items():
+            value = self.prepare_value(value, bot=bot, files=files)
+            if not value:
+                continue
+            form.add_field(key, value)
+        form.add_field("reply_markup", keyboard.serialized)
+        for key, value in files.items():
+            form.add_field(key, value.read(bot), filename=value.filename or key)
+        return form
+
+
+DEVICE_TYPE_KB = _static([
+    [InlineKeyboardButton(text="🧊 Холодильник", callback_data="type:fridge")],
+    [InlineKeyboardButton(text="❄️ Морозилка", callback_data="type:freezer")]
+])
+
+YES_NO_KB = _static([
+    [
+        InlineKeyboardButton(text="✅ Да", callback_data="add_more"),
+        InlineKeyboardButton(text="❌ Нет", callback_data="finish_devices")
+    ]
+])
+
+START_SESSION_KB = _static([
+    [
+        InlineKeyboardButton(text="✅ Да", callback_data="start_session"),
+        InlineKeyboardButton(text="❌ Нет", callback_data="cancel_session")
+    ]
+])
+
+NEW_ENTRY_KB = _static([
+    [InlineKeyboardButton(text="🔄 Начать новую запись", callback_data="new_entry")]
+])
+
+CHANGE_COFFEE_KB = _static([
+    [InlineKeyboardButton(text="🔁 Изменить кофейню", callback_data="restart")]
+])
+
+RESUME_SESSION_KB = _static([
+    [InlineKeyboardButton(text="▶️ Продолжить", callback_data="resume_session")]
+])
 
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 def device_type_kb() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🧊 Холодильник", callback_data="type:fridge")],
-        [InlineKeyboardButton(text="❄️ Морозилка", callback_data="type:freezer")]
-    ])
+    return DEVICE_TYPE_KB
+
 
 def yes_no_kb() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="✅ Да", callback_data="add_more"),
-            InlineKeyboardButton(text="❌ Нет", callback_data="finish_devices")
-        ]
-    ])
+    return YES_NO_KB
+
+
+# Страница списка кофеен: каждая страница собирается один раз на версию справочника
+def coffee_keyboard(page: int) -> InlineKeyboardMarkup:
+    return _coffee_page(page, catalogue.version)
+
+
+@lru_cache(maxsize=128)
+def _coffee_page(page: int, version: int) -> InlineKeyboardMarkup:
+    shops = catalogue.shops
+    start = page * PER_PAGE
+    end = start + PER_PAGE
+    buttons = [
+        [InlineKeyboardButton(text=shop.name, callback_data=f"select_shop:{shop.id}")]
+        for shop in shops[start:end]
+    ]
+    nav_buttons = []
+    if page > 0:
+        nav_buttons.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"page:{page - 1}"))
+    if end < len(shops):
+        nav_buttons.append(InlineKeyboardButton(text="➡️ Далее", callback_data=f"page:{page + 1}"))
+    if nav_buttons:
+        buttons.append(nav_buttons)
+    return _static(buttons)
+
+
+# Результаты поиска кофейни + возврат к полному списку
+def shop_search_keyboard(shops: list[CoffeeShop]) -> InlineKeyboardMarkup:
+    buttons = [
+        [InlineKeyboardButton(text=shop.name, callback_data=f"select_shop:{shop.id}")]
+        for shop in shops
+    ]
+    buttons.append([InlineKeyboardButton(text="📋 Весь список", callback_data="page:0")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -0,0 +1,66 @@
+# utils/parsing.py
+# Разбор температур: одно число или вся сессия одним сообщением ("Х 3.5 4.1 / М -18 -19.5")
+
+import re
+
+# Всё, что за пределами, — почти наверняка опечатка
+MIN_VALID_TEMP = -50.0
+MAX_VALID_TEMP = 50.0
+
+DEVICE_MARKERS = {
+    "х": "fridge", "x": "fridge", "холодильник": "fridge", "холодильники": "fridge",
+    "м": "freezer", "m": "freezer", "морозилка": "freezer", "морозилки": "freezer",
+}
+
+BULK_START_RE = re.compile(r"^\s*(" + "|".join(sorted(DEVICE_MARKERS, key=len, reverse=True)) + r")[\s:]", re.I)
+# Запятая между цифрами — десятичная, остальные — разделители
+DECIMAL_COMMA_RE = re.compile(r"(?<=\d),(?=\d)")
+SIGN_SPACE_RE = re.compile(r"(?<=[\-+−])\s+")
+TOKEN_RE = re.compile(r"[^\s/;,:]+")
+
+
+class TemperatureParseError(ValueError):
+    pass
+
+
+# Нормализация одного значения: "4,3" -> "4.3", "- 18" -> "-18"
+def normalize_temperature(text: str) -> str:
+    return SIGN_SPACE_RE.sub("", text.replace(",", ".").replace("−", "-").strip())
+
+
+def parse_temperature(text: str) -> float:
+    try:
+        temp = float(normalize_temperature(text))
+    except ValueError:
+        raise TemperatureParseError(f"«{text.strip()}» — не число")
+    if not MIN_VALID_TEMP <= temp <= MAX_VALID_TEMP:
+        raise TemperatureParseError(f"{temp:g} — слишком необычная температура, проверь значение")
+    return temp
+
+
+def is_bulk_entry(text: str | None) -> bool:
+    return bool(text and BULK_START_RE.match(text))
+
+
+# "Х 3.5 4.1 2.9 / М -18 -19.5" -> [("fridge", 3.5), ..., ("freezer", -19.5)]
+def parse_bulk_entries(text: str) -> list[tuple[str, float]]:
+    text = SIGN_SPACE_RE.sub("", DECIMAL_COMMA_RE.sub(".", text.replace("−", "-")))
+    entries = []
+    device_type = None
+    errors = []
+    for token in TOKEN_RE.findall(text):
+        marker = DEVICE_MARKERS.get(token.lower())
+        if marker:
+            device_type = marker
+            continue
+        if device_type is None:
+            raise TemperatureParseError("Начни с типа устройства: Х — холодильники, М — морозилки")
+        try:
+            entries.append((device_type, parse_temperature(token)))
+        except TemperatureParseError as e:
+            errors.append(str(e))
+    if errors:
+        raise TemperatureParseError("; ".join(errors))
+    if not entries:
+        raise TemperatureParseError("Не найдено ни одной температуры")
+    return entries
@@ -0,0 +1,78 @@
+# webhook.py
+# Режим webhook: aiohttp-сервер принимает апдейты от Telegram и передаёт их в Dispatcher
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from metrics import register_metrics_route
+
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # Публичный адрес, например https://bot.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")  # Обязателен: Telegram присылает его в X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "80"))  # containerPort из amvera.yml
+# Сколько апдейтов обрабатываем одновременно; остальные ждут ответа сервера
+WEBHOOK_MAX_CONCURRENCY = int(os.getenv("WEBHOOK_MAX_CONCURRENCY", "50"))
+
+
+# Обработка апдейтов в фоне, но не больше max_concurrency одновременно
+class BoundedRequestHandler(SimpleRequestHandler):
+    def __init__(self, *args, max_concurrency: int = WEBHOOK_MAX_CONCURRENCY, **kwargs):
+        super().__init__(*args, handle_in_background=True, **kwargs)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _background_feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        try:
+            await super()._background_feed_update(bot, update)
+        finally:
+            self.semaphore.release()
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        # Пока все слоты заняты, Telegram ждёт ответа — это и есть обратное давление
+        await self.semaphore.acquire()
+        try:
+            return await super()._handle_request_background(bot, request)
+        except BaseException:
+            self.semaphore.release()
+            raise
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, **data: Any):
+    # Без секрета SimpleRequestHandler принимает любой POST на открытом порту — поддельные апдейты
+    if not WEBHOOK_SECRET:
+        raise RuntimeError("BOT_MODE=webhook требует WEBHOOK_SECRET: без него апдейты не проверяются")
+    app = web.Application()
+    BoundedRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=WEBHOOK_SECRET,
+        **data,
+    ).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot, **data)
+    register_metrics_route(app)
+
+    if WEBHOOK_URL:
+        await bot.set_webhook(
+            f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+    else:
+        logging.warning("[WEBHOOK] WEBHOOK_URL не задан — setWebhook не вызывается")
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=WEBHOOK_HOST, port=WEBHOOK_PORT)
+    await site.start()
+    logging.info(f"[WEBHOOK] Слушаем {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()